@@ -0,0 +1,145 @@
+"""Benchmarks for saving, loading and uprating FRS microdata.
+
+With the package installed, runs against a synthetic download in a
+temporary data folder, and writes the timings to a JSON file so that
+versions can be compared:
+
+    python benchmarks/run.py --households 20000 --output results.json
+    python benchmarks/run.py --households 20000 --compare results.json
+"""
+
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+YEAR = 2018
+TARGET_YEAR = 2022
+TARGET_YEARS = list(range(2019, 2025))
+
+
+def timeit(fn, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return dict(median=statistics.median(times), min=min(times), times=times)
+
+
+def main():
+    parser = ArgumentParser(description="Benchmark the FRS package.")
+    parser.add_argument("--households", type=int, default=10_000)
+    parser.add_argument("--extra-columns", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--output", type=str, default="benchmark.json")
+    parser.add_argument(
+        "--compare",
+        type=str,
+        help="A previous results file to compare the timings against.",
+    )
+    args = parser.parse_args()
+
+    workspace = Path(tempfile.mkdtemp(prefix="frs-benchmark-"))
+    # Must be set before the package is imported.
+    os.environ["FRS_DATA_PATH"] = str(workspace / "data")
+
+    import numpy as np
+    import pandas as pd
+    from family_resources_survey import FRS
+    from family_resources_survey.load import (
+        load,
+        Uprating,
+        BatchUprating,
+    )
+    from family_resources_survey.save import (
+        save,
+        parse_codebook,
+        DATA_PATH,
+    )
+    from family_resources_survey.synthetic import generate
+
+    archive = generate(
+        workspace / "download",
+        households=args.households,
+        extra_columns=args.extra_columns,
+        zipped=True,
+    )
+    extracted = generate(
+        workspace / "extracted",
+        households=args.households,
+        extra_columns=args.extra_columns,
+    )
+    results = dict(
+        ingest=timeit(lambda: save(archive, YEAR, jobs=args.jobs), 1),
+        parse_codebook=timeit(
+            lambda: parse_codebook(next(Path(extracted).iterdir())),
+            args.repeat,
+        ),
+    )
+
+    adult_csv = DATA_PATH / str(YEAR) / "raw" / "adult.csv"
+    adult = load(YEAR, "adult")
+    frs = FRS(YEAR)
+    frs.adult
+
+    benchmarks = dict(
+        load_csv=lambda: pd.read_csv(adult_csv, low_memory=False),
+        load_cold=lambda: FRS(YEAR).adult,
+        load_warm=lambda: frs.adult,
+        load_projected=lambda: load(
+            YEAR, "adult", columns=["AGE80", "GROSS4"], add_entity_ids=False
+        ).to_numpy(),
+        uprate=lambda: Uprating(YEAR, TARGET_YEAR)(adult),
+        uprate_each=lambda: [
+            Uprating(YEAR, year)(adult) for year in TARGET_YEARS
+        ],
+        uprate_batch=lambda: BatchUprating(YEAR, TARGET_YEARS)(adult),
+        aggregate=lambda: frs.aggregate("adult", "INEARNS"),
+        groupby=lambda: adult.groupby("household_id").INEARNS.sum(),
+    )
+    for name, fn in benchmarks.items():
+        results[name] = timeit(fn, args.repeat)
+
+    output = dict(
+        households=args.households,
+        rows=dict(adult=len(adult)),
+        python=platform.python_version(),
+        numpy=np.__version__,
+        pandas=pd.__version__,
+        version=package_version(),
+        results=results,
+    )
+    with open(args.output, "w") as f:
+        json.dump(output, f, indent=2)
+    baseline = {}
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    for name, result in results.items():
+        line = f"{name:>16}: {result['median'] * 1e3:10.2f} ms"
+        if name in baseline:
+            ratio = result["median"] / baseline[name]["median"]
+            line += f" ({ratio:.2f}x baseline)"
+        print(line)
+    shutil.rmtree(workspace)
+
+
+def package_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("family_resources_survey")
+    except Exception:
+        return "unknown"
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from collections.abc import Mapping
+
+
+def is_memory_mapped(values: np.ndarray) -> bool:
+    """Whether an array's memory is a file mapping (and so not private)."""
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        base = getattr(values, "base", None)
+        if base is not None and not isinstance(base, np.ndarray):
+            # The buffer of a memory map opened by np.load.
+            return type(base).__name__ == "mmap"
+        values = base
+    return False
+
+
+def frame_bytes(df: pd.DataFrame, shared_with: pd.DataFrame = None) -> int:
+    """The private memory held by a table's columns.
+
+    Memory-mapped columns are not counted, as their pages belong to the OS
+    page cache, and neither are columns shared with another table.
+
+    Args:
+        df (pd.DataFrame): The table.
+        shared_with (pd.DataFrame, optional): A table whose column buffers are already counted.
+
+    Returns:
+        int: The number of bytes.
+    """
+    total = 0
+    for column in df.columns:
+        values = df[column].values
+        if not isinstance(values, np.ndarray):
+            total += int(df[column].memory_usage(index=False, deep=True))
+            continue
+        if is_memory_mapped(values):
+            continue
+        if (
+            shared_with is not None
+            and column in shared_with.columns
+            and np.may_share_memory(values, shared_with[column].values)
+        ):
+            continue
+        total += values.nbytes
+    return total
+
+
+class TableCache(Mapping):
+    """A least-recently-used cache of tables with a byte budget.
+
+    The budget is of private memory: memory-mapped columns are not counted,
+    as the OS can drop their pages at any time. A table derived from
+    another (e.g. an uprated view sharing its columns) is only sized by its
+    own columns, so it is evicted together with the table it is based on.
+
+    Args:
+        max_bytes (int, optional): The most private memory to hold. Defaults to no limit.
+    """
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.bases = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    def __getitem__(self, key):
+        if key not in self.entries:
+            self.misses += 1
+            raise KeyError(key)
+        self.hits += 1
+        if key in self.bases:
+            # Using a derived table uses the table it is based on too.
+            self.entries.move_to_end(self.bases[key])
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self.entries
+
+    def put(
+        self, key, table: pd.DataFrame, nbytes: int = None, base=None
+    ) -> None:
+        """Add a table, evicting the least recently used ones if over budget.
+
+        Args:
+            key: The key to store the table under.
+            table (pd.DataFrame): The table.
+            nbytes (int, optional): The private memory the table holds. Defaults to measuring it.
+            base (optional): The key of a cached table this one shares columns with, and is evicted with. Defaults to none.
+        """
+        if key in self.entries:
+            self.remove(key)
+        if nbytes is None:
+            nbytes = frame_bytes(table)
+        self.entries[key] = table
+        self.sizes[key] = nbytes
+        self.bytes += nbytes
+        if base is not None and base in self.entries:
+            self.bases[key] = base
+        if self.max_bytes is not None:
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                oldest = next(iter(self.entries))
+                if oldest == key or self.bases.get(key) == oldest:
+                    # Only the new table (and its base) are left to evict.
+                    break
+                self.evictions += self.remove(oldest)
+
+    def remove(self, key) -> int:
+        """Remove a table, and any tables based on it.
+
+        Returns:
+            int: The number of tables removed.
+        """
+        del self.entries[key]
+        self.bytes -= self.sizes.pop(key)
+        self.bases.pop(key, None)
+        removed = 1
+        for derived in [k for k, base in self.bases.items() if base == key]:
+            removed += self.remove(derived)
+        return removed
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.sizes.clear()
+        self.bases.clear()
+        self.bytes = 0
+
+    @property
+    def stats(self) -> dict:
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            bytes=self.bytes,
+            entries=len(self.entries),
+            max_bytes=self.max_bytes,
+        )
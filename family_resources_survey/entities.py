@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from family_resources_survey import storage
+
+# The table holding one row per entity, for each group entity.
+ENTITY_TABLES = {"benunit": "benunit", "household": "househol"}
+KEY_VARS = ("sernum", "BENUNIT")
+
+
+def read_keys(year_folder: Path, table: str) -> pd.DataFrame:
+    """Read the household and benefit unit keys of a stored table.
+
+    Args:
+        year_folder (Path): The folder holding a year of data.
+        table (str): The table name.
+
+    Returns:
+        pd.DataFrame: The int64 household and benefit unit keys (where present).
+    """
+    columnar_path = year_folder / "columns" / table
+    if storage.has_table(columnar_path):
+        stored = storage.table_columns(columnar_path)
+        df = storage.read_table(
+            columnar_path, [column for column in KEY_VARS if column in stored]
+        )
+    else:
+        df = pd.read_csv(
+            year_folder / "raw" / (table + ".csv"),
+            usecols=lambda column: column in KEY_VARS,
+        )
+    keys = pd.DataFrame(index=df.index)
+    if "sernum" in df.columns:
+        keys["household"] = df.sernum.to_numpy(np.int64) * 100
+        if "BENUNIT" in df.columns:
+            keys["benunit"] = (
+                keys["household"] + df.BENUNIT.to_numpy(np.int64) * 10
+            )
+    return keys
+
+
+def positions(keys: np.ndarray, target_keys: np.ndarray) -> np.ndarray:
+    """Find the row of each key in a table of unique keys.
+
+    Args:
+        keys (np.ndarray): The keys to look up.
+        target_keys (np.ndarray): The unique keys of the target table.
+
+    Returns:
+        np.ndarray: The row of each key in the target table, or -1 if absent.
+    """
+    if len(target_keys) == 0:
+        return np.full(len(keys), -1, dtype=np.int32)
+    order = np.argsort(target_keys, kind="stable")
+    sorted_keys = target_keys[order]
+    found = np.searchsorted(sorted_keys, keys).clip(0, len(sorted_keys) - 1)
+    return np.where(sorted_keys[found] == keys, order[found], -1).astype(
+        np.int32
+    )
+
+
+def build_entity_index(year_folder: Path) -> None:
+    """Store the benefit unit and household row of each row of each table.
+
+    The index is written to the 'entities' folder of the year, as a
+    columnar table per data table with a 'benunit' and 'household' column
+    (where the table has the keys for them).
+
+    Args:
+        year_folder (Path): The folder holding a year of data.
+    """
+    year_folder = Path(year_folder)
+    tables = table_names(year_folder)
+    targets = {}
+    for entity, target_table in ENTITY_TABLES.items():
+        if target_table in tables:
+            target_keys = read_keys(year_folder, target_table)
+            if entity in target_keys:
+                targets[entity] = target_keys[entity].to_numpy()
+    for table in tables:
+        keys = read_keys(year_folder, table)
+        index = pd.DataFrame(
+            {
+                entity: positions(keys[entity].to_numpy(), target_keys)
+                for entity, target_keys in targets.items()
+                if entity in keys
+            }
+        )
+        storage.write_table(index, year_folder / "entities" / table)
+
+
+def table_names(year_folder: Path) -> list:
+    if (year_folder / "columns").exists():
+        return [
+            path.name
+            for path in (year_folder / "columns").iterdir()
+            if storage.has_table(path)
+        ]
+    return [path.stem for path in (year_folder / "raw").glob("*.csv")]
+
+
+def load_entity_index(year_folder: Path, table: str) -> pd.DataFrame:
+    """Load the entity index of a table, building it first if needed."""
+    index_path = Path(year_folder) / "entities" / table
+    if not storage.has_table(index_path):
+        build_entity_index(year_folder)
+    return storage.read_table(index_path)
+
+
+def aggregate(
+    values: np.ndarray, positions: np.ndarray, size: int, how: str = "sum"
+) -> np.ndarray:
+    """Reduce values to the entities they belong to.
+
+    Args:
+        values (np.ndarray): The values to reduce.
+        positions (np.ndarray): The entity row of each value (-1 if none).
+        size (int): The number of entities.
+        how (str, optional): One of 'sum', 'mean', 'count', 'min' or 'max'. Defaults to 'sum'.
+
+    Raises:
+        ValueError: If the reduction isn't recognised.
+
+    Returns:
+        np.ndarray: The reduced value for each entity.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = positions >= 0
+    if not valid.all():
+        values, positions = values[valid], positions[valid]
+    if how == "sum":
+        return np.bincount(positions, weights=values, minlength=size)
+    if how == "count":
+        return np.bincount(positions, minlength=size)
+    if how == "mean":
+        totals = np.bincount(positions, weights=values, minlength=size)
+        counts = np.bincount(positions, minlength=size)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return totals / counts
+    if how in ("min", "max"):
+        reduce = np.minimum if how == "min" else np.maximum
+        result = np.full(size, np.inf if how == "min" else -np.inf)
+        reduce.at(result, positions, values)
+        result[np.bincount(positions, minlength=size) == 0] = np.nan
+        return result
+    raise ValueError(f"Unknown aggregation: {how}")
+
+
+def broadcast(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Give each row the value of the entity it belongs to (NaN if none)."""
+    values = np.asarray(values)
+    if (positions >= 0).all():
+        return values[positions]
+    result = values.astype(np.float64)[positions]
+    result[positions < 0] = np.nan
+    return result
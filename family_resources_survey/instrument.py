@@ -0,0 +1,137 @@
+import json
+import threading
+import time
+import tracemalloc
+from typing import Callable
+
+# Functions called with a record of each finished stage.
+hooks = []
+# The stages open in each thread, innermost last.
+_local = threading.local()
+
+
+def _stack() -> list:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def add_hook(hook: Callable[[dict], None]) -> None:
+    """Call a function with a record of every instrumented stage.
+
+    Each record is a dict with the stage 'name', its 'seconds', and where
+    known its 'rows', 'bytes' read and 'peak_memory' (if tracing memory),
+    plus any details of the stage such as the 'table'.
+
+    Args:
+        hook (Callable[[dict], None]): The function to call.
+    """
+    hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[dict], None]) -> None:
+    hooks.remove(hook)
+
+
+def trace_memory(enabled: bool = True) -> None:
+    """Start (or stop) recording the peak memory allocated in each stage.
+
+    Memory is traced for the whole process, so a stage's peak includes
+    allocations made meanwhile by other threads (e.g. in FRS.panel).
+    """
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def json_log(path: str) -> Callable[[dict], None]:
+    """A hook which appends each record to a JSON lines file."""
+
+    def hook(record: dict) -> None:
+        with open(path, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    return hook
+
+
+def emit(record: dict) -> None:
+    """Pass a record made elsewhere (e.g. in a worker process) to the hooks."""
+    for hook in hooks:
+        hook(record)
+
+
+class Stage:
+    """Times a stage of work and reports it to the hooks on exit."""
+
+    def __init__(self, name: str, details: dict):
+        self.values = dict(name=name, **details)
+
+    def record(self, **values) -> None:
+        """Add measurements such as 'rows' or 'bytes' to the stage."""
+        self.values.update(values)
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __enter__(self) -> "Stage":
+        stack = _stack()
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if len(stack) > 0 and hasattr(stack[-1], "peak"):
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.start_memory = self.peak = current
+        stack.append(self)
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.values["seconds"] = time.perf_counter() - self.start_time
+        stack = _stack()
+        stack.pop()
+        if tracemalloc.is_tracing() and hasattr(self, "peak"):
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            self.values["peak_memory"] = self.peak - self.start_memory
+            if len(stack) > 0 and hasattr(stack[-1], "peak"):
+                stack[-1].peak = max(stack[-1].peak, self.peak)
+        self.values["start"] = self.start_time
+        self.values["depth"] = len(stack)
+        emit(self.values)
+
+
+class NullStage:
+    """Stands in for a Stage when nothing is listening, at almost no cost."""
+
+    def record(self, **values) -> None:
+        pass
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __enter__(self) -> "NullStage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+NULL_STAGE = NullStage()
+
+
+def stage(name: str, **details) -> Stage:
+    """Instrument a stage of work, for use as a context manager.
+
+    Without hooks this returns a shared no-op stage (which is falsy, so
+    costly measurements can be skipped with `if s: ...`).
+
+    Args:
+        name (str): The stage name, e.g. 'load.read'.
+        **details: Details to include in the record, e.g. the table.
+
+    Returns:
+        Stage: The stage.
+    """
+    if len(hooks) == 0:
+        return NULL_STAGE
+    return Stage(name, details)
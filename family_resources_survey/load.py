@@ -1,12 +1,26 @@
 import json
+import os
+import re
+import numpy as np
 import pandas as pd
-from typing import Union, List
-from family_resources_survey.save import FRS_path
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Iterator, Union, List
+from pathlib import Path
+from family_resources_survey.save import FRS_path, DATA_PATH
+from family_resources_survey import storage, entities, instrument, manifest
+from family_resources_survey.cache import TableCache, frame_bytes
 import yaml
 import warnings
 
 ADULT_AGE_VAR = "AGE80"
 WEIGHT_VAR = "GROSS4"
+ENTITY_KEY_VARS = ("sernum", "BENUNIT", "PERSON")
+# Marks lazily loaded attributes which haven't been loaded yet.
+NOT_LOADED = object()
+# Coded in the codebook, but used as numbers here.
+NUMERIC_VARS = ENTITY_KEY_VARS + (ADULT_AGE_VAR, WEIGHT_VAR)
 
 
 def load(
@@ -14,28 +28,326 @@ def load(
     table: str,
     columns: List[str] = None,
     add_entity_ids: bool = True,
+    mmap: bool = True,
+    categorical: bool = False,
+    shared: bool = False,
 ) -> pd.DataFrame:
+    """Load a stored table.
+
+    Args:
+        year (int): The year of the table.
+        table (str): The table name.
+        columns (List[str], optional): The columns to load. Defaults to all.
+        add_entity_ids (bool, optional): Whether to add person, benefit unit and household IDs. Defaults to True.
+        mmap (bool, optional): Whether to memory-map columnar tables. Defaults to True.
+        categorical (bool, optional): Whether to decode coded columns to categoricals. Defaults to False.
+        shared (bool, optional): Whether to decode tables only stored as CSV into a memory-mapped cache, shared by every process on the host. Columnar tables are always memory-mapped (with mmap), so this does not affect them. Defaults to False.
+
+    Raises:
+        FileNotFoundError: If the year is not stored.
+
+    Returns:
+        pd.DataFrame: The table.
+    """
     year = str(year)
-    data_path = FRS_path / "data" / year / "raw"
-    if data_path.exists():
+    data_path = DATA_PATH / year / "raw"
+    columnar_path = DATA_PATH / year / "columns"
+    if data_path.exists() or columnar_path.exists():
         if table is not None:
-            df = pd.read_csv(
-                data_path / (table + ".csv"), usecols=columns, low_memory=False
-            )
-            if add_entity_ids:
-                if "PERSON" in df.columns:
-                    df["person_id"] = (
-                        df.sernum * 1e2 + df.BENUNIT * 1e1 + df.PERSON
+            schema = load_schema(year, table)
+            cache_path = DATA_PATH / year / "cache" / table
+            with instrument.stage("load.read", table=table) as stage:
+                if storage.has_table(columnar_path / table):
+                    df = storage.read_table(
+                        columnar_path / table, columns=columns, mmap=mmap
                     )
-                if "BENUNIT" in df.columns:
-                    df["benunit_id"] = df.sernum * 1e2 + df.BENUNIT * 1e1
-                if "sernum" in df.columns:
-                    df["household_id"] = df.sernum * 1e2
+                    if stage:
+                        stage.record(
+                            bytes=storage.column_bytes(
+                                columnar_path / table, df.columns
+                            )
+                        )
+                elif shared:
+                    if not storage.has_table(cache_path):
+                        storage.cache_table(
+                            data_path / (table + ".csv"),
+                            cache_path,
+                            dtype=schema.get("dtypes"),
+                        )
+                    df = storage.read_table(cache_path, columns=columns)
+                else:
+                    df = pd.read_csv(
+                        data_path / (table + ".csv"),
+                        usecols=columns,
+                        dtype=schema.get("dtypes"),
+                        low_memory=False,
+                    )
+                    if stage:
+                        stage.record(
+                            bytes=os.path.getsize(data_path / (table + ".csv"))
+                        )
+                stage.record(rows=len(df))
+            if categorical:
+                with instrument.stage("load.categorical", table=table):
+                    decode_columns(df, schema)
+            if add_entity_ids:
+                with instrument.stage("load.entity_ids", table=table):
+                    add_entity_id_columns(df)
         return df
     else:
         raise FileNotFoundError("Could not find the data requested.")
 
 
+def iter_chunks(
+    year: int,
+    table: str,
+    columns: List[str] = None,
+    chunksize: int = 100_000,
+    where: Union[str, Callable] = None,
+    add_entity_ids: bool = True,
+    categorical: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """Load a stored table a chunk of rows at a time, optionally filtered.
+
+    The filter is applied to each chunk as it is read, so rows failing it
+    are never held in memory. For columnar tables only the filter's columns
+    are read for every row: the other columns are read for matching rows.
+    Each chunk keeps the original row numbers as its index.
+
+    Args:
+        year (int): The year of the table.
+        table (str): The table name.
+        columns (List[str], optional): The columns to load. Defaults to all.
+        chunksize (int, optional): The number of rows to read at a time. Defaults to 100,000.
+        where (Union[str, Callable], optional): A filter, either an expression like "AGE80 >= 65" or a function from a chunk to a boolean mask. A function can only use the columns loaded.
+        add_entity_ids (bool, optional): Whether to add person, benefit unit and household IDs. Defaults to True.
+        categorical (bool, optional): Whether to decode coded columns to categoricals (after filtering on the codes). Defaults to False.
+
+    Yields:
+        pd.DataFrame: The (filtered) rows of each chunk.
+    """
+    year = str(year)
+    available = stored_columns(year, table)
+    schema = load_schema(year, table)
+    if columns is None:
+        columns = available
+    extra = []
+    if add_entity_ids:
+        extra += [var for var in ENTITY_KEY_VARS if var in available]
+    if isinstance(where, str):
+        # Read the columns the expression names, even if not requested.
+        filter_columns = [
+            name
+            for name in dict.fromkeys(
+                re.findall(r"[A-Za-z_][A-Za-z0-9_]*", where)
+            )
+            if name in available
+        ]
+        extra += filter_columns
+    to_read = list(dict.fromkeys(list(columns) + extra))
+    if where is not None and not isinstance(where, str):
+        filter_columns = to_read
+
+    def mask(chunk: pd.DataFrame) -> np.ndarray:
+        if isinstance(where, str):
+            return np.asarray(chunk.eval(where), dtype=bool)
+        return np.asarray(where(chunk), dtype=bool)
+
+    def finish(chunk: pd.DataFrame) -> pd.DataFrame:
+        if categorical:
+            decode_columns(chunk, schema)
+        if add_entity_ids:
+            add_entity_id_columns(chunk)
+        dropped = [column for column in to_read if column not in columns]
+        return chunk.drop(columns=dropped) if len(dropped) > 0 else chunk
+
+    columnar_path = DATA_PATH / year / "columns" / table
+    if storage.has_table(columnar_path):
+        num_rows = storage.num_rows(columnar_path)
+        for start in range(0, num_rows, chunksize):
+            rows = np.arange(start, min(start + chunksize, num_rows))
+            if where is not None:
+                filtered = storage.read_rows(
+                    columnar_path, filter_columns, rows
+                )
+                rows = rows[mask(filtered)]
+                if len(rows) == 0:
+                    continue
+            yield finish(storage.read_rows(columnar_path, to_read, rows))
+    else:
+        for chunk in pd.read_csv(
+            DATA_PATH / year / "raw" / (table + ".csv"),
+            usecols=to_read,
+            dtype=schema.get("dtypes"),
+            chunksize=chunksize,
+        ):
+            if where is not None:
+                chunk = chunk[mask(chunk)]
+                if len(chunk) == 0:
+                    continue
+            yield finish(chunk[to_read])
+
+
+def decode_columns(df: pd.DataFrame, schema: dict) -> None:
+    """Decode the coded columns of a table to categoricals, in place."""
+    for column, pairs in schema.get("categories", {}).items():
+        if column in df.columns and column not in NUMERIC_VARS:
+            df[column] = to_categorical(df[column], pairs)
+
+
+def add_entity_id_columns(df: pd.DataFrame) -> None:
+    """Add person, benefit unit and household IDs to a table, in place."""
+    with warnings.catch_warnings():
+        # Memory-mapped tables keep a block per column by design.
+        warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+        if "PERSON" in df.columns:
+            df["person_id"] = (
+                as_id(df.sernum) * 100
+                + as_id(df.BENUNIT) * 10
+                + as_id(df.PERSON)
+            )
+        if "BENUNIT" in df.columns:
+            df["benunit_id"] = as_id(df.sernum) * 100 + as_id(df.BENUNIT) * 10
+        if "sernum" in df.columns:
+            df["household_id"] = as_id(df.sernum) * 100
+
+
+def stored_columns(year: int, table: str) -> List[str]:
+    """List the columns stored for a table, without reading its data."""
+    year = str(year)
+    columnar_path = DATA_PATH / year / "columns" / table
+    if storage.has_table(columnar_path):
+        return storage.table_columns(columnar_path)
+    csv_path = DATA_PATH / year / "raw" / (table + ".csv")
+    if not csv_path.exists():
+        raise FileNotFoundError("Could not find the data requested.")
+    return list(pd.read_csv(csv_path, nrows=0).columns)
+
+
+def harmonise(
+    frames: List[pd.DataFrame], columns: List[str] = None
+) -> List[pd.DataFrame]:
+    """Give a set of tables the same columns, each with a single type.
+
+    Args:
+        frames (List[pd.DataFrame]): The tables.
+        columns (List[str], optional): The columns to keep. Defaults to every column in any table.
+
+    Returns:
+        List[pd.DataFrame]: The tables, with missing columns filled with NaN.
+    """
+    if columns is None:
+        columns = list(
+            dict.fromkeys(column for frame in frames for column in frame)
+        )
+    dtypes = {}
+    for column in columns:
+        column_dtypes = [
+            frame[column].dtype for frame in frames if column in frame
+        ]
+        if any(
+            isinstance(dtype, pd.CategoricalDtype) for dtype in column_dtypes
+        ):
+            dtypes[column] = object
+            continue
+        if len(column_dtypes) < len(frames):
+            # Missing in some years, so needs to hold NaN.
+            column_dtypes.append(np.dtype(np.float32))
+        dtypes[column] = (
+            np.result_type(*column_dtypes)
+            if len(column_dtypes) > 0
+            else np.float32
+        )
+    return [frame.reindex(columns=columns).astype(dtypes) for frame in frames]
+
+
+def load_schema(year: int, table: str) -> dict:
+    """Load the schema stored for a table, or an empty one if none was saved."""
+    schema_path = DATA_PATH / str(year) / "schema" / (table + ".json")
+    if not schema_path.exists():
+        return {}
+    with open(schema_path) as f:
+        return json.load(f)
+
+
+def as_id(values: pd.Series) -> pd.Series:
+    """Widen an entity key column to int64, so IDs built from it are exact."""
+    if pd.api.types.is_integer_dtype(values):
+        return values.astype(np.int64)
+    return values.astype(np.float64)
+
+
+def to_categorical(values: pd.Series, pairs: List[list]) -> pd.Series:
+    """Decode a coded column into a categorical of its labels.
+
+    Args:
+        values (pd.Series): The coded values.
+        pairs (List[list]): The (code, label) pairs from the codebook. Codes without a label keep the code as their label.
+
+    Returns:
+        pd.Series: The categorical column.
+    """
+    codes = pd.Categorical(values)
+    labels_by_code = dict(pairs)
+    labels = [
+        labels_by_code.get(float(code), f"{code:g}")
+        for code in codes.categories
+    ]
+    unique_labels = list(dict.fromkeys(labels))
+    label_positions = {label: i for i, label in enumerate(unique_labels)}
+    positions = np.array([label_positions[label] for label in labels] + [-1])
+    return pd.Series(
+        pd.Categorical.from_codes(positions[codes.codes], unique_labels),
+        index=values.index,
+        name=values.name,
+    )
+
+
+@lru_cache(maxsize=None)
+def uprating_parameters() -> dict:
+    """The uprating parameters, parsed once per process."""
+    with open(FRS_path / "uprating" / "uprating.yaml") as f:
+        return yaml.safe_load(f)
+
+
+@lru_cache(maxsize=None)
+def population_projections() -> pd.DataFrame:
+    """The population projections by age band, parsed once per process."""
+    return pd.read_csv(
+        FRS_path / "uprating" / "population_projections.csv"
+    ).set_index("lower_age")
+
+
+def parameter_multiplier(variable: str, base_year: int, target_year: int):
+    parameters = uprating_parameters()
+    if variable not in parameters:
+        raise Exception(f"Uprating parameters do not contain {variable}")
+    if base_year not in parameters[variable]:
+        raise Exception(
+            f"Uprating parameters do not contain the rate for {base_year} for {variable}"
+        )
+    if target_year not in parameters[variable]:
+        raise Exception(
+            f"Uprating parameters do not contain the rate for {target_year} for {variable}"
+        )
+    return parameters[variable][target_year] / parameters[variable][base_year]
+
+
+def age_bands(age: pd.Series) -> np.ndarray:
+    """Find the row of each age's band in the population projections.
+
+    Raises:
+        KeyError: If an age has no band in the projections.
+    """
+    lower_ages = population_projections().index.to_numpy()
+    lower_age = (np.asarray(age, dtype=np.float64) // 5) * 5
+    bands = np.searchsorted(lower_ages, lower_age).clip(0, len(lower_ages) - 1)
+    if not (lower_ages[bands] == lower_age).all():
+        missing = np.unique(lower_age[lower_ages[bands] != lower_age])
+        raise KeyError(f"No population projections for ages {missing}")
+    return bands
+
+
 class Uprating:
     affected_by = {
         "labour_income": ["INEARNS", "NINEARNS", "UGRSPAY", "SEINCAM2"]
@@ -47,51 +359,51 @@ class Uprating:
         if base_year is not None and target_year is not None:
             self.empty = False
             self.multipliers = {}
-
-            with open(FRS_path / "uprating" / "uprating.yaml") as f:
-                self.parameters = yaml.safe_load(f)
-
-            self.population_projection_by_age = pd.read_csv(
-                FRS_path / "uprating" / "population_projections.csv"
-            ).set_index("lower_age")
+            self.parameters = uprating_parameters()
+            self.population_projection_by_age = population_projections()
             self.population_projection = (
                 self.population_projection_by_age.sum()
             )
 
             for variable in ("labour_income",):
-                if variable not in self.parameters:
-                    raise Exception(
-                        f"Uprating parameters do not contain {variable}"
-                    )
-                if base_year not in self.parameters[variable]:
-                    raise Exception(
-                        f"Uprating parameters do not contain the rate for {base_year} for {variable}"
-                    )
-                if target_year not in self.parameters[variable]:
-                    raise Exception(
-                        f"Uprating parameters do not contain the rate for {target_year} for {variable}"
-                    )
-                self.multipliers[variable] = (
-                    self.parameters[variable][target_year]
-                    / self.parameters[variable][base_year]
+                self.multipliers[variable] = parameter_multiplier(
+                    variable, base_year, target_year
                 )
         else:
             self.empty = True
 
+    def required_columns(
+        self, columns: List[str], available: List[str]
+    ) -> List[str]:
+        """Add any columns needed to uprate the given columns of a table.
+
+        Args:
+            columns (List[str]): The columns requested.
+            available (List[str]): The columns stored for the table.
+
+        Returns:
+            List[str]: The columns to load.
+        """
+        columns = list(columns)
+        if (
+            not self.empty
+            and WEIGHT_VAR in columns
+            and ADULT_AGE_VAR in available
+            and ADULT_AGE_VAR not in columns
+        ):
+            columns.append(ADULT_AGE_VAR)
+        return columns
+
     def uprate_adult_weight(
         self,
         adult_weight: pd.Series,
         age: pd.Series,
     ) -> pd.Series:
-        lower_age = (age // 5) * 5
-        base_year_populations = self.population_projection_by_age[
-            str(self.base_year)
-        ][lower_age].values
-        target_year_populations = self.population_projection_by_age[
-            str(self.target_year)
-        ][lower_age].values
-        multipliers = target_year_populations / base_year_populations
-        return adult_weight * multipliers
+        multipliers = (
+            self.population_projection_by_age[str(self.target_year)]
+            / self.population_projection_by_age[str(self.base_year)]
+        ).to_numpy()
+        return adult_weight * multipliers[age_bands(age)]
 
     def uprate_group_weight(self, group_weight: pd.Series) -> pd.Series:
         base_year_population = self.population_projection[str(self.base_year)]
@@ -102,72 +414,391 @@ class Uprating:
         return group_weight * multiplier
 
     def __call__(self, table: pd.DataFrame) -> pd.DataFrame:
-        table = table.copy(deep=True)
+        """Uprate a table.
+
+        The table is never modified: if there is nothing to uprate it is
+        returned as-is, and otherwise a copy is returned with the uprated
+        columns replaced (see replace_columns).
+        """
         if self.empty:
             return table
+        with instrument.stage("uprate", rows=len(table)):
+            return self._uprate(table)
+
+    def _uprate(self, table: pd.DataFrame) -> pd.DataFrame:
+        uprated = {}
         for variable in self.multipliers:
             for affected_variable in self.affected_by[variable]:
                 if affected_variable in table.columns:
-                    table[affected_variable] *= self.multipliers[variable]
-        if ADULT_AGE_VAR in table.columns:
-            table[WEIGHT_VAR] = self.uprate_adult_weight(
+                    uprated[affected_variable] = (
+                        table[affected_variable] * self.multipliers[variable]
+                    )
+        if WEIGHT_VAR in table.columns and ADULT_AGE_VAR in table.columns:
+            uprated[WEIGHT_VAR] = self.uprate_adult_weight(
                 table[WEIGHT_VAR], table[ADULT_AGE_VAR]
             ).values
         elif WEIGHT_VAR in table.columns:
-            table[WEIGHT_VAR] = self.uprate_group_weight(
+            uprated[WEIGHT_VAR] = self.uprate_group_weight(
                 table[WEIGHT_VAR]
             ).values
-        return table
+        return replace_columns(table, uprated)
+
+
+class BatchUprating:
+    """Uprates a table from one base year to many target years at once.
+
+    The multipliers for every target year are computed up front (by age
+    band for adult weights), so each uprated column is a single broadcast
+    product of shape (rows, target years).
+    """
+
+    def __init__(self, base_year: int, target_years: List[int]):
+        self.base_year = base_year
+        self.target_years = list(target_years)
+        self.multipliers = {
+            variable: np.array(
+                [
+                    parameter_multiplier(variable, base_year, target_year)
+                    for target_year in self.target_years
+                ]
+            )
+            for variable in Uprating.affected_by
+        }
+        projections = population_projections()
+        target_columns = [str(year) for year in self.target_years]
+        # Age bands x target years.
+        self.age_multipliers = (
+            projections[target_columns].to_numpy()
+            / projections[[str(base_year)]].to_numpy()
+        )
+        totals = projections.sum()
+        self.group_multipliers = (
+            totals[target_columns].to_numpy() / totals[str(base_year)]
+        )
+
+    def __call__(self, table: pd.DataFrame) -> dict:
+        """Uprate the incomes and weights in a table to each target year.
+
+        Args:
+            table (pd.DataFrame): The table.
+
+        Returns:
+            dict: For each uprated column, an array of shape (rows, target years).
+        """
+        uprated = {}
+        for variable, multipliers in self.multipliers.items():
+            for affected_variable in Uprating.affected_by[variable]:
+                if affected_variable in table.columns:
+                    uprated[affected_variable] = np.outer(
+                        table[affected_variable].to_numpy(np.float64),
+                        multipliers,
+                    )
+        if WEIGHT_VAR in table.columns:
+            weights = table[WEIGHT_VAR].to_numpy(np.float64)[:, None]
+            if ADULT_AGE_VAR in table.columns:
+                uprated[WEIGHT_VAR] = (
+                    weights
+                    * self.age_multipliers[age_bands(table[ADULT_AGE_VAR])]
+                )
+            else:
+                uprated[WEIGHT_VAR] = weights * self.group_multipliers
+        return uprated
+
+
+def copy_on_write() -> bool:
+    """Whether pandas copies shared columns when written to.
+
+    Always on from pandas 3, and an option before that.
+    """
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.get_option("mode.copy_on_write") is True
+
+
+def isolated_copy(table: pd.DataFrame) -> pd.DataFrame:
+    """Copy a table so that writes to the copy never reach the original.
+
+    With copy-on-write this is a free shallow copy. Without it, the columns
+    must be copied.
+    """
+    return table.copy(deep=not copy_on_write())
+
+
+def replace_columns(table: pd.DataFrame, columns: dict) -> pd.DataFrame:
+    """Return a new frame with some columns replaced, sharing the rest.
+
+    The rest are only shared with copy-on-write (see isolated_copy), so
+    writes to the new frame never reach the original table.
+
+    Args:
+        table (pd.DataFrame): The original table, which is left unchanged.
+        columns (dict): The replacement values for each column name.
+
+    Returns:
+        pd.DataFrame: The new table.
+    """
+    out = isolated_copy(table)
+    for name, values in columns.items():
+        out[name] = values
+    return out
 
 
 class FRS:
-    def __init__(self, year: int, add_entity_ids=True):
+    """A year of FRS microdata, with each table loaded on first use.
+
+    Years not stored are uprated from the latest year stored.
+
+    Args:
+        year (int): The year.
+        add_entity_ids (bool, optional): Whether to add person, benefit unit and household IDs. Defaults to True.
+        categorical (bool, optional): Whether to decode coded columns to categoricals. Defaults to False.
+        cache_bytes (int, optional): The most private memory for loaded tables to hold (see TableCache). Memory-mapped columns, the bulk of a table saved by save(), are not counted. Defaults to no limit.
+        shared (bool, optional): Whether to decode tables only stored as CSV into a memory-mapped cache (see load). Tables saved by save() are memory-mapped, and so already shared by every process through the OS page cache. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        year: int,
+        add_entity_ids=True,
+        categorical=False,
+        cache_bytes: int = None,
+        shared: bool = False,
+    ):
         year = int(year)
         self.year = year
-        self.tables = {}
+        self.tables = TableCache(cache_bytes)
+        self.shared = shared
+        self.entity_indices = {}
+        self._manifest = NOT_LOADED
         self.add_entity_ids = add_entity_ids
-        self.data_path = FRS_path / "data" / str(year)
+        self.categorical = categorical
+        self.data_path = DATA_PATH / str(year)
         codebook_path = self.data_path / "codebook.json"
-        self.variables = {}
         self.uprater = Uprating()
-        if not self.data_path.exists():
-            available_years = list(
-                map(lambda path: int(path.name), (FRS_path / "data").iterdir())
-            )
-            if len(available_years) == 0:
-                raise FileNotFoundError(f"No FRS years stored.")
-            try:
-                base_year = available_years[-1]
-                self.uprater = Uprating(base_year, year)
-                self.year = base_year
-            except Exception as e:
-                raise Exception(
-                    f"No data for {year} stored, and uprating failed: {e}"
-                )
-        if codebook_path.exists():
-            with open(codebook_path, "r") as f:
-                codebook = json.load(f)
-                self.variables = {}
-                for var in codebook:
-                    self.variables[var] = FRSVariable()
-                    if "description" in codebook[var]:
-                        self.variables[var].description = codebook[var][
-                            "description"
-                        ]
-                    if "codemap" in codebook[var]:
-                        self.variables[var].codemap = codebook[var]["codemap"]
+        with instrument.stage("frs.init", year=year):
+            if not self.data_path.exists():
+                available_years = manifest.available_years(DATA_PATH)
+                if len(available_years) == 0:
+                    raise FileNotFoundError(f"No FRS years stored.")
+                try:
+                    base_year = available_years[-1]
+                    self.uprater = Uprating(base_year, year)
+                    self.year = base_year
+                    self.data_path = DATA_PATH / str(base_year)
+                    codebook_path = self.data_path / "codebook.json"
+                except Exception as e:
+                    raise Exception(
+                        f"No data for {year} stored, and uprating failed: {e}"
+                    )
+            self.variables = FRSVariables(codebook_path)
 
     def __getattr__(self, name: str) -> pd.DataFrame:
         if name == "description":
             return self.description
-        if name not in self.tables:
-            self.tables[name] = load(
-                self.year, name, add_entity_ids=self.add_entity_ids
+        # Uprated views are cached. Each call returns an isolated copy, so
+        # writes to a returned table never reach the cache.
+        key = (name, self.uprater.base_year, self.uprater.target_year)
+        if not self.uprater.empty and key in self.tables:
+            return isolated_copy(self.tables[key])
+        try:
+            table = self.tables[name]
+        except KeyError:
+            with instrument.stage("frs.load", table=name):
+                table = load(
+                    self.year,
+                    name,
+                    add_entity_ids=self.add_entity_ids,
+                    categorical=self.categorical,
+                    shared=self.shared,
+                )
+            self.tables.put(name, table)
+        if self.uprater.empty:
+            return isolated_copy(table)
+        uprated = self.uprater(table)
+        self.tables.put(
+            key,
+            uprated,
+            nbytes=frame_bytes(uprated, shared_with=table),
+            base=name,
+        )
+        return isolated_copy(uprated)
+
+    @property
+    def cache_stats(self) -> dict:
+        """Hits, misses, evictions and private bytes of the table cache."""
+        return self.tables.stats
+
+    def load_table(
+        self, table: str, columns: List[str] = None
+    ) -> pd.DataFrame:
+        """Load (and uprate) some columns of a table, without caching it.
+
+        Args:
+            table (str): The table name.
+            columns (List[str], optional): The columns to load. Defaults to all.
+
+        Returns:
+            pd.DataFrame: The table.
+        """
+        if columns is None:
+            return self.uprater(
+                load(
+                    self.year,
+                    table,
+                    add_entity_ids=self.add_entity_ids,
+                    categorical=self.categorical,
+                )
+            )
+        available = stored_columns(self.year, table)
+        to_load = self.uprater.required_columns(columns, available)
+        df = self.uprater(
+            load(
+                self.year,
+                table,
+                columns=to_load,
+                add_entity_ids=self.add_entity_ids,
+                categorical=self.categorical,
+            )
+        )
+        extra = [column for column in to_load if column not in columns]
+        return df.drop(columns=extra) if len(extra) > 0 else df
+
+    def entity_index(self, table: str) -> pd.DataFrame:
+        """The benefit unit and household row of each row of a table."""
+        if table not in self.entity_indices:
+            self.entity_indices[table] = entities.load_entity_index(
+                DATA_PATH / str(self.year), table
             )
-        return self.uprater(self.tables[name])
+        return self.entity_indices[table]
+
+    def aggregate(
+        self, table: str, column: str, to: str = "household", how="sum"
+    ) -> pd.Series:
+        """Aggregate a column of a table to benefit units or households.
+
+        Args:
+            table (str): The table name, e.g. 'adult'.
+            column (str): The column to aggregate.
+            to (str, optional): The entity to aggregate to: 'benunit' or 'household'. Defaults to 'household'.
+            how (str, optional): One of 'sum', 'mean', 'count', 'min' or 'max'. Defaults to 'sum'.
+
+        Returns:
+            pd.Series: The aggregated values, aligned to the rows of the entity's table.
+        """
+        positions = self.entity_index(table)[to].to_numpy()
+        size = len(self.entity_index(entities.ENTITY_TABLES[to]))
+        values = getattr(self, table)[column].to_numpy()
+        return pd.Series(
+            entities.aggregate(values, positions, size, how=how), name=column
+        )
+
+    def broadcast(
+        self, values, table: str, from_: str = "household"
+    ) -> pd.Series:
+        """Give each row of a table the value of its benefit unit or household.
+
+        Args:
+            values (array-like): The values, aligned to the rows of the entity's table.
+            table (str): The table to broadcast to, e.g. 'adult'.
+            from_ (str, optional): The entity the values belong to: 'benunit' or 'household'. Defaults to 'household'.
+
+        Returns:
+            pd.Series: The values, aligned to the rows of the table.
+        """
+        positions = self.entity_index(table)[from_].to_numpy()
+        return pd.Series(
+            entities.broadcast(np.asarray(values), positions),
+            name=getattr(values, "name", None),
+        )
+
+    def iter_chunks(
+        self,
+        table: str,
+        columns: List[str] = None,
+        chunksize: int = 100_000,
+        where: Union[str, Callable] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """Load (and uprate) a table a chunk of rows at a time.
+
+        Args:
+            table (str): The table name.
+            columns (List[str], optional): The columns to load. Defaults to all.
+            chunksize (int, optional): The number of rows to read at a time. Defaults to 100,000.
+            where (Union[str, Callable], optional): A filter applied while reading, e.g. "AGE80 >= 65". Filters use the stored (not uprated) values.
+
+        Yields:
+            pd.DataFrame: The (filtered, uprated) rows of each chunk.
+        """
+        available = stored_columns(self.year, table)
+        if columns is None:
+            columns = available
+        to_load = self.uprater.required_columns(columns, available)
+        extra = [column for column in to_load if column not in columns]
+        for chunk in iter_chunks(
+            self.year,
+            table,
+            columns=to_load,
+            chunksize=chunksize,
+            where=where,
+            add_entity_ids=self.add_entity_ids,
+            categorical=self.categorical,
+        ):
+            chunk = self.uprater(chunk)
+            yield chunk.drop(columns=extra) if len(extra) > 0 else chunk
+
+    @staticmethod
+    def panel(
+        years: List[int],
+        table: str,
+        columns: List[str] = None,
+        jobs: int = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """Load a table for several years at once, as a single frame.
+
+        Years are loaded concurrently. Columns missing from some years are
+        filled with NaN, and each column is given one type across years.
+
+        Args:
+            years (List[int]): The years to load.
+            table (str): The table name.
+            columns (List[str], optional): The columns to load. Defaults to all.
+            jobs (int, optional): The number of threads to use. Defaults to one per year.
+            **kwargs: Passed to FRS for each year.
+
+        Returns:
+            pd.DataFrame: The table for every year, with a 'year' column.
+        """
+        years = [int(year) for year in years]
+
+        def load_year(year: int) -> pd.DataFrame:
+            frs = FRS(year, **kwargs)
+            if columns is None:
+                return frs.load_table(table)
+            available = stored_columns(frs.year, table)
+            present = [column for column in columns if column in available]
+            if len(present) == 0:
+                # Keep the year's rows, to be filled with NaN.
+                return pd.DataFrame(index=pd.RangeIndex(frs.nrows(table)))
+            return frs.load_table(table, present)
+
+        with ThreadPoolExecutor(max_workers=jobs or len(years)) as pool:
+            frames = list(pool.map(load_year, years))
+        frames = harmonise(frames, columns)
+        for year, frame in zip(years, frames):
+            frame.insert(0, "year", np.int16(year))
+        return pd.concat(frames, ignore_index=True)
 
     @property
     def table_names(self):
+        if self.manifest is not None:
+            return list(self.manifest["tables"])
+        if (self.data_path / "columns").exists():
+            return [
+                path.name
+                for path in (self.data_path / "columns").iterdir()
+                if storage.has_table(path)
+            ]
         return list(
             map(
                 lambda p: p.name.split(".csv")[0],
@@ -175,6 +806,36 @@ class FRS:
             )
         )
 
+    @property
+    def manifest(self) -> dict:
+        """The manifest written when the year was saved (None if older)."""
+        if self._manifest is NOT_LOADED:
+            self._manifest = manifest.load_manifest(self.data_path)
+        return self._manifest
+
+    def columns(self, table: str) -> dict:
+        """The columns of a table and their types, without reading it."""
+        if self.manifest is not None:
+            return dict(self.manifest["tables"][table]["columns"])
+        schema = load_schema(self.year, table)
+        dtypes = schema.get("dtypes", {})
+        return {
+            column: dtypes.get(column)
+            for column in stored_columns(self.year, table)
+        }
+
+    def nrows(self, table: str) -> int:
+        """The number of rows in a table, without reading it."""
+        if self.manifest is not None:
+            return self.manifest["tables"][table]["rows"]
+        columnar_path = self.data_path / "columns" / table
+        if storage.has_table(columnar_path):
+            return storage.num_rows(columnar_path)
+        first_column = stored_columns(self.year, table)[:1]
+        return len(
+            load(self.year, table, columns=first_column, add_entity_ids=False)
+        )
+
 
 class FRSVariable:
     description = "No description provided"
@@ -191,3 +852,67 @@ class FRSVariable:
             "..." if len(self.description) > 60 else ""
         )
         return f'<FRS Variable, description = "{short_desc}" ({len(self.codemap)} categories)>'
+
+
+class FRSVariables(Mapping):
+    """The variables in a stored codebook, read lazily.
+
+    Nothing is read until the variables are first used. Each FRSVariable is
+    then built on first lookup, reading only its own entry in the codebook
+    when the codebook index is stored.
+    """
+
+    def __init__(self, codebook_path: Path):
+        self.codebook_path = codebook_path
+        self.index_path = codebook_path.with_name("codebook.index.json")
+        self._index = None
+        self._codebook = None
+        self._variables = {}
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            with instrument.stage("codebook.index"):
+                self._index = self._load_index()
+        return self._index
+
+    def _load_index(self) -> dict:
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                return json.load(f)
+        elif self.codebook_path.exists():
+            # Saved before the index was stored: read the whole codebook.
+            with open(self.codebook_path) as f:
+                self._codebook = json.load(f)
+            return dict.fromkeys(self._codebook)
+        return {}
+
+    def _read_entry(self, name: str) -> dict:
+        if self._codebook is not None:
+            return self._codebook[name]
+        offset, length = self.index[name]
+        with open(self.codebook_path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def __getitem__(self, name: str) -> "FRSVariable":
+        if name not in self._variables:
+            if name not in self.index:
+                raise KeyError(name)
+            entry = self._read_entry(name)
+            variable = FRSVariable()
+            if "description" in entry:
+                variable.description = entry["description"]
+            if "codemap" in entry:
+                variable.codemap = entry["codemap"]
+            self._variables[name] = variable
+        return self._variables[name]
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, name) -> bool:
+        return name in self.index
@@ -1,4 +1,6 @@
 from family_resources_survey.save import save
+from family_resources_survey.load import FRS
+from family_resources_survey import instrument
 from argparse import ArgumentParser
 
 
@@ -7,7 +9,10 @@ def main():
         description="Utility to manage Family Resources Survey microdata."
     )
     parser.add_argument(
-        "action", choices=["save"], type=str, help="Save a UKDA FRS download."
+        "action",
+        choices=["save", "profile"],
+        type=str,
+        help="Save a UKDA FRS download, or profile loading a table.",
     )
     parser.add_argument(
         "--path", type=str, help="The path to the microdata download."
@@ -23,10 +28,65 @@ def main():
         action="store_true",
         help="Whether the download is zipped or a folder.",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="The number of processes to convert tables with.",
+    )
+    parser.add_argument(
+        "--table", type=str, help="The table to profile loading."
+    )
+    parser.add_argument(
+        "--log",
+        type=str,
+        help="A file to append a JSON record of each stage to.",
+    )
     args = parser.parse_args()
 
+    if args.log is not None:
+        instrument.add_hook(instrument.json_log(args.log))
+
     if args.action == "save":
         if args.path is None or args.year is None:
             print("A path and year must be provided.")
             exit(1)
-        save(folder=args.path, year=args.year, zipped=args.zipped)
+        save(
+            folder=args.path,
+            year=args.year,
+            zipped=args.zipped,
+            jobs=args.jobs,
+        )
+    elif args.action == "profile":
+        if args.year is None or args.table is None:
+            print("A year and table must be provided.")
+            exit(1)
+        profile(year=args.year, table=args.table)
+
+
+def profile(year: int, table: str) -> None:
+    """Load a table, printing the time, rows, bytes and memory of each stage."""
+    records = []
+    instrument.add_hook(records.append)
+    instrument.trace_memory()
+    with instrument.stage("total", year=year, table=table):
+        frs = FRS(year)
+        getattr(frs, table)
+    instrument.trace_memory(False)
+    instrument.remove_hook(records.append)
+
+    print(
+        f"{'stage':<24}{'seconds':>10}{'rows':>12}{'MB read':>10}{'peak MB':>10}"
+    )
+    for record in sorted(records, key=lambda record: record["start"]):
+        name = "  " * record["depth"] + record["name"]
+        rows = f"{record['rows']:,}" if "rows" in record else ""
+        read = f"{record['bytes'] / 1e6:.1f}" if "bytes" in record else ""
+        peak = (
+            f"{record['peak_memory'] / 1e6:.1f}"
+            if "peak_memory" in record
+            else ""
+        )
+        print(
+            f"{name:<24}{record['seconds']:>10.4f}{rows:>12}{read:>10}{peak:>10}"
+        )
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "manifest.lock"
+# Seconds to wait for the lock, after which it is taken to be left behind
+# by a process which crashed while holding it.
+LOCK_TIMEOUT = 60
+
+
+def file_hash(*paths: Path) -> str:
+    """The SHA-256 hash of the contents of one or more files, in order."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def table_entry(
+    csv_path: Path, columnar_folder: Path, dtypes: dict, rows: int
+) -> dict:
+    """Describe a saved table for the manifest.
+
+    Args:
+        csv_path (Path): The CSV copy of the table.
+        columnar_folder (Path): The columnar copy of the table.
+        dtypes (dict): The storage type of each column, in column order.
+        rows (int): The number of rows.
+
+    Returns:
+        dict: The columns and their types, row count, and size and hash of each copy.
+    """
+    column_paths = [columnar_folder / (column + ".npy") for column in dtypes]
+    return dict(
+        columns=dtypes,
+        rows=rows,
+        bytes=dict(
+            csv=os.path.getsize(csv_path),
+            columns=sum(os.path.getsize(path) for path in column_paths),
+        ),
+        hashes=dict(
+            csv=file_hash(csv_path),
+            columns=file_hash(*column_paths),
+        ),
+    )
+
+
+def load_manifest(folder: Path) -> dict:
+    """Load the manifest in a folder, or None if there isn't one."""
+    path = Path(folder) / MANIFEST_FILE
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(folder: Path, manifest: dict) -> None:
+    """Write a manifest, replacing any previous one in a single step."""
+    path = Path(folder) / MANIFEST_FILE
+    staging = path.with_name(f".{MANIFEST_FILE}.{os.getpid()}.tmp")
+    with open(staging, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(staging, path)
+
+
+@contextmanager
+def locked(folder: Path, timeout: float = LOCK_TIMEOUT):
+    """Hold a lock file in a folder, so one process at a time updates it.
+
+    Args:
+        folder (Path): The folder to lock.
+        timeout (float, optional): The seconds to wait before breaking a lock left behind. Defaults to LOCK_TIMEOUT.
+    """
+    path = Path(folder) / LOCK_FILE
+    while True:
+        try:
+            handle = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > timeout:
+                    os.unlink(path)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        os.close(handle)
+        os.unlink(path)
+
+
+def record_year(data_folder: Path, year: int, tables: dict) -> None:
+    """Add (or update) a saved year in the top-level manifest.
+
+    Saves of different years can run at once, so the manifest is updated
+    under a lock.
+
+    Args:
+        data_folder (Path): The folder holding every year of data.
+        year (int): The year saved.
+        tables (dict): The manifest entry of each table saved.
+    """
+    with locked(data_folder):
+        manifest = load_manifest(data_folder)
+        if manifest is None:
+            # Include any years saved before manifests were written.
+            manifest = dict(
+                years={
+                    str(stored_year): {}
+                    for stored_year in available_years(data_folder)
+                }
+            )
+        manifest["years"][str(year)] = dict(
+            tables=sorted(tables),
+            rows={table: entry["rows"] for table, entry in tables.items()},
+        )
+        write_manifest(data_folder, manifest)
+
+
+def available_years(data_folder: Path) -> List[int]:
+    """The years stored, in ascending order.
+
+    Read from the top-level manifest, or from the year folders for data
+    saved before manifests were written.
+    """
+    data_folder = Path(data_folder)
+    manifest = load_manifest(data_folder)
+    if manifest is not None:
+        years = [
+            int(year)
+            for year in manifest["years"]
+            if (data_folder / year).exists()
+        ]
+    elif data_folder.exists():
+        years = [
+            int(path.name)
+            for path in data_folder.iterdir()
+            if path.is_dir() and path.name.isdigit()
+        ]
+    else:
+        years = []
+    return sorted(years)
@@ -1,20 +1,35 @@
 import pandas as pd
 from pathlib import Path
 import os
+import hashlib
 import shutil
 from tqdm import tqdm
 import warnings
 import json
 import re
+import time
+import zipfile
+from fnmatch import fnmatch
+from typing import List
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from family_resources_survey import storage, instrument, manifest
+from family_resources_survey.entities import build_entity_index
 
 FRS_path = Path(__file__).parent
+# Where microdata is stored: inside the package unless overridden.
+DATA_PATH = Path(os.environ.get("FRS_DATA_PATH", FRS_path / "data"))
+DEFAULT_CHUNKSIZE = 50_000
+# Increase when the conversion of TAB files changes, so re-saving a year
+# converts every table again.
+CONVERSION_VERSION = 3
+CODEBOOK_COLUMNS = ["VARIABLE", "DESCRIPTION (SAS LABEL)", "VALUE", "DECODE"]
 
 
 def parse_codebook(main_folder: Path) -> dict:
     """Attempts to automatically parse an Excel FRS codebook.
 
     Args:
-        main_folder (Path): The path to the folder containing 'mrdoc' and 'tab'.
+        main_folder (Path): The path to the folder containing 'mrdoc' and 'tab'. This can also be a zipfile.Path inside the UKDA archive.
 
     Raises:
         FileNotFoundError: If the codebook can't be found.
@@ -23,90 +38,308 @@ def parse_codebook(main_folder: Path) -> dict:
     Returns:
         dict: The dictionary of descriptions for variable names.
     """
+    codebook_path = find_codebook(main_folder)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            with codebook_path.open("rb") as f:
+                xls = pd.ExcelFile(f, engine="openpyxl")
+                df = pd.read_excel(
+                    xls,
+                    "VARIABLE LISTING",
+                    usecols=CODEBOOK_COLUMNS,
+                )
+        # Rows after a variable's first row hold the rest of its
+        # decodes, so forward-fill the variable names.
+        df["VARIABLE"] = df.VARIABLE.ffill()
+        df = df[df.VARIABLE.notna()]
+        descriptions = (
+            df.drop_duplicates("VARIABLE")
+            .set_index("VARIABLE")["DESCRIPTION (SAS LABEL)"]
+            .fillna("No description provided")
+        )
+        codebook = {
+            name: dict(description=description)
+            for name, description in descriptions.items()
+        }
+        decodes = df[df.VALUE.notna()]
+        for name, group in decodes.groupby("VARIABLE", sort=False):
+            codebook[name]["codemap"] = dict(zip(group.VALUE, group.DECODE))
+        return codebook
+    except:
+        raise Exception("Couldn't parse the codebook.")
+
+
+def find_codebook(main_folder: Path) -> Path:
+    """Find the Excel codebook in a UKDA download.
+
+    Args:
+        main_folder (Path): The path to the folder containing 'mrdoc' and 'tab'.
+
+    Raises:
+        FileNotFoundError: If the codebook can't be found.
+
+    Returns:
+        Path: The path to the codebook.
+    """
     excel_folder = main_folder / "mrdoc" / "excel"
     if excel_folder.exists():
-        matches = tuple(excel_folder.glob("*hierarchical_benv_income*.xlsx"))
+        matches = tuple(
+            path
+            for path in excel_folder.iterdir()
+            if fnmatch(path.name, "*hierarchical_benv_income*.xlsx")
+        )
         if len(matches) == 0:
             raise FileNotFoundError(
                 "Found the excel folder, but could not find the codebook."
             )
-        else:
-            try:
-                codebook = dict()
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore")
-                    xls = pd.ExcelFile(matches[0], engine="openpyxl")
-                    df = pd.read_excel(xls, "VARIABLE LISTING")
-                    for _, row in df.iterrows():
-                        if row.VARIABLE not in codebook:
-                            codebook[row["VARIABLE"]] = dict(
-                                description=row["DESCRIPTION (SAS LABEL)"]
-                            )
-                    df = df.set_index(df.VARIABLE.ffill())
-                    for name, x in tqdm(
-                        df.groupby(df.index),
-                        desc="Reading decodes for variables",
-                    ):
-                        for _, row in x.iterrows():
-                            if not row.VALUE != row.VALUE:
-                                if name not in codebook:
-                                    codebook[name] = dict(
-                                        description="No description provided",
-                                        codemap=dict(),
-                                    )
-                                if "codemap" not in codebook[name]:
-                                    codebook[name]["codemap"] = dict()
-                                codebook[name]["codemap"][
-                                    row.VALUE
-                                ] = row.DECODE
-                return codebook
-            except:
-                raise Exception("Couldn't parse the codebook.")
+        return matches[0]
     else:
         raise FileNotFoundError("Could not find the excel codebook folder.")
 
 
-def save(folder: str, year: int, zipped: bool = True) -> None:
+def write_codebook(codebook: dict, folder: Path) -> None:
+    """Write a parsed codebook, with an index of where each variable is.
+
+    codebook.json holds the full codebook. codebook.index.json holds the
+    byte offset and length of each variable's entry within it, so single
+    variables can be read without parsing the whole file.
+
+    Args:
+        codebook (dict): The parsed codebook.
+        folder (Path): The folder to write the codebook to.
+    """
+    index = {}
+    with open(folder / "codebook.json", "wb") as f:
+        f.write(b"{")
+        for i, (name, entry) in enumerate(codebook.items()):
+            prefix = (", " if i > 0 else "") + json.dumps(str(name)) + ": "
+            f.write(prefix.encode("utf-8"))
+            encoded = json.dumps(entry).encode("utf-8")
+            index[str(name)] = [f.tell(), len(encoded)]
+            f.write(encoded)
+        f.write(b"}")
+    with open(folder / "codebook.index.json", "w") as f:
+        json.dump(index, f)
+
+
+def to_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce every column of a table to a numeric type.
+
+    Only the columns the CSV parser could not already read as numbers are
+    converted, rather than applying pd.to_numeric to every column.
+
+    Args:
+        df (pd.DataFrame): The table.
+
+    Returns:
+        pd.DataFrame: The numeric table.
+    """
+    for column in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+    return df
+
+
+def convert_table(
+    source: str,
+    member: str,
+    target_folder: Path,
+    columnar_folder: Path,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    coded_columns: List[str] = (),
+) -> dict:
+    """Convert a single TAB file to the CSV and columnar stores, in chunks.
+
+    Args:
+        source (str): The path to the UKDA zip, or None if the member is a plain file.
+        member (str): The name of the TAB file inside the zip, or its path.
+        target_folder (Path): The folder to write the CSV file to.
+        columnar_folder (Path): The folder to write the columnar tables to.
+        chunksize (int, optional): The number of rows to convert at a time.
+        coded_columns (List[str], optional): The (upper-case) names of codebook-coded columns.
+
+    Returns:
+        dict: The table name, number of rows, bytes read and seconds taken.
+    """
+    start_time = time.time()
+    table_name = Path(member).name.replace(".tab", "")
+    if source is not None:
+        archive = zipfile.ZipFile(source)
+        num_bytes = archive.getinfo(member).file_size
+        open_member = lambda: archive.open(member)
+    else:
+        archive = None
+        num_bytes = os.path.getsize(member)
+        open_member = lambda: open(member, "rb")
+    writer = storage.TableWriter(columnar_folder / table_name, coded_columns)
+    with open_member() as f:
+        header = pd.read_csv(f, delimiter="\t", nrows=0).columns
+    with open_member() as f:
+        for chunk in pd.read_csv(
+            f, delimiter="\t", chunksize=chunksize, low_memory=False
+        ):
+            writer.append(to_numeric(chunk))
+    num_rows = writer.close(columns=list(header))
+    if archive is not None:
+        archive.close()
+
+    # Write the CSV copy from the compacted columns, so integer columns are
+    # written as integers throughout.
+
+    csv_path = target_folder / (table_name + ".csv")
+    df = storage.read_table(columnar_folder / table_name)
+    for start in range(0, max(num_rows, 1), chunksize):
+        df.iloc[start : start + chunksize].to_csv(
+            csv_path, index=False, mode="a", header=start == 0
+        )
+    entry = manifest.table_entry(
+        csv_path, columnar_folder / table_name, writer.dtypes, num_rows
+    )
+    return dict(
+        table=table_name,
+        rows=num_rows,
+        bytes=num_bytes,
+        seconds=time.time() - start_time,
+        dtypes=writer.dtypes,
+        manifest=entry,
+    )
+
+
+def table_schema(dtypes: dict, codebook: dict = None) -> dict:
+    """Build the stored schema of a table.
+
+    Args:
+        dtypes (dict): The storage type of each column.
+        codebook (dict, optional): The parsed codebook, used to find the categories of coded columns.
+
+    Returns:
+        dict: The column types, and the (code, label) pairs of each column with a codemap.
+    """
+    categories = {}
+    if codebook is not None:
+        codemaps = {
+            name.upper(): entry["codemap"]
+            for name, entry in codebook.items()
+            if "codemap" in entry
+        }
+        for column in dtypes:
+            if column.upper() not in codemaps:
+                continue
+            pairs = []
+            for code, label in codemaps[column.upper()].items():
+                try:
+                    pairs.append([float(code), str(label)])
+                except (TypeError, ValueError):
+                    continue
+            if len(pairs) > 0:
+                categories[column] = pairs
+    return dict(dtypes=dtypes, categories=categories)
+
+
+def save(
+    folder: str,
+    year: int,
+    zipped: bool = True,
+    jobs: int = 1,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> None:
     """Save the FRS microdata to the package internal storage.
 
+    Tables are read directly from the zip (without extracting it) and
+    converted a chunk of rows at a time, so peak memory does not grow with
+    the size of the largest table.
+
+    Re-saving a year only converts tables whose TAB file (or the conversion
+    itself) has changed. The year is built in a staging folder and swapped
+    in atomically when complete (see swap_in), so a failed save leaves the
+    stored year as it was.
+
     Args:
         folder (str): A path to the (zipped or unzipped) folder downloaded from the UK Data Archive.
         year (int): The year to store the microdata as.
         zipped (bool, optional): Whether the folder given is zipped. Defaults to True.
+        jobs (int, optional): The number of processes to convert tables with. Defaults to 1.
+        chunksize (int, optional): The number of rows to convert at a time. Defaults to 50,000.
 
     Raises:
         FileNotFoundError: If an invalid path is given.
     """
 
-    # Get the folder ready.
+    # Get the folder ready. Everything is written to a staging folder, which
+    # replaces the stored year only once it is complete.
 
     folder = Path(folder)
     if not os.path.exists(folder):
         raise FileNotFoundError("Invalid path supplied.")
     if zipped:
-        new_folder = FRS_path / "data" / "tmp"
-        shutil.unpack_archive(folder, new_folder)
-        folder = new_folder
+        source = str(folder)
+        archive = zipfile.ZipFile(folder)
+        folder = zipfile.Path(archive)
+    else:
+        source = None
+        archive = None
     main_folder = next(folder.iterdir())
     year = str(year)
-    target_folder = FRS_path / "data" / year / "raw"
-    if os.path.exists(target_folder):
-        # Overwrite
-        shutil.rmtree(target_folder)
-    os.makedirs(target_folder)
-
-    # Look for the codebook.
+    year_folder = DATA_PATH / year
+    previous = manifest.load_manifest(year_folder) or {}
+    staging_folder = DATA_PATH / f".{year}.staging-{os.getpid()}"
+    if staging_folder.exists():
+        shutil.rmtree(staging_folder)
+    target_folder = staging_folder / "raw"
+    columnar_folder = staging_folder / "columns"
+    schema_folder = staging_folder / "schema"
+    for folder_to_create in (target_folder, columnar_folder, schema_folder):
+        os.makedirs(folder_to_create)
 
     try:
-        codebook = parse_codebook(main_folder)
-        with open(FRS_path / "data" / year / "codebook.json", "w+") as f:
-            json.dump(codebook, f)
-    except:
-        print("Couldn't automatically parse the codebook.")
+        # Look for the codebook, reusing the stored one if it's unchanged.
+
+        codebook = None
+        codebook_source = None
+        try:
+            with instrument.stage("save.codebook"):
+                codebook_source = source_hash(
+                    find_codebook(main_folder), archive
+                )
+                if (
+                    previous.get("codebook") == codebook_source
+                    and (year_folder / "codebook.index.json").exists()
+                ):
+                    for name in ("codebook.json", "codebook.index.json"):
+                        link(year_folder / name, staging_folder / name)
+                    with open(staging_folder / "codebook.json") as f:
+                        codebook = json.load(f)
+                else:
+                    codebook = parse_codebook(main_folder)
+                    write_codebook(codebook, staging_folder)
+        except:
+            print("Couldn't automatically parse the codebook.")
+            codebook_source = None
+
+        # Save the data, skipping tables whose source and conversion are
+        # unchanged since they were stored.
 
-    # Save the data.
+        # Imported here, as the load module imports this one.
+        from family_resources_survey.load import NUMERIC_VARS, Uprating
 
-    if (main_folder / "tab").exists():
+        # Columns used as numbers may be coded in the codebook too, but must
+        # not be narrowed (see storage.narrowest_dtype).
+        numeric_columns = {
+            name.upper()
+            for name in list(NUMERIC_VARS)
+            + sum(Uprating.affected_by.values(), [])
+        }
+        coded_columns = sorted(
+            name.upper()
+            for name, entry in (codebook or {}).items()
+            if "codemap" in entry and name.upper() not in numeric_columns
+        )
+        # Which columns are coded decides their types, so is part of the
+        # conversion settings a stored table must match to be reused.
+        coding = hashlib.sha256(json.dumps(coded_columns).encode()).hexdigest()
+        if not (main_folder / "tab").exists():
+            raise FileNotFoundError("Could not find the TAB files.")
         data_folder = main_folder / "tab"
         criterion = re.compile("[a-z]+\.tab")
         data_files = [
@@ -114,20 +347,204 @@ def save(folder: str, year: int, zipped: bool = True) -> None:
             for path in data_folder.iterdir()
             if criterion.match(path.name)
         ]
-        task = tqdm(data_files, desc="Saving data tables")
-        for i, filepath in enumerate(task):
-            task.set_description(f"Saving {filepath.name}")
-            table_name = filepath.name.replace(".tab", "")
-            df = pd.read_csv(filepath, delimiter="\t", low_memory=False).apply(
-                pd.to_numeric, errors="coerce"
+        task = tqdm(total=len(data_files), desc="Saving data tables")
+        results = []
+        arguments = []
+        sources = {}
+        for path in data_files:
+            table_name = path.name.replace(".tab", "")
+            sources[table_name] = dict(
+                hash=source_hash(path, archive),
+                version=CONVERSION_VERSION,
+                coding=coding,
             )
-            df.to_csv(target_folder / (table_name + ".csv"), index=False)
-            if i == len(task) - 1:
-                task.set_description("Saved all tables")
-    else:
-        raise FileNotFoundError("Could not find the TAB files.")
+            entry = previous.get("tables", {}).get(table_name)
+            if (
+                entry is not None
+                and entry.get("source") == sources[table_name]
+            ):
+                if reuse_table(
+                    year_folder, staging_folder, table_name, entry["columns"]
+                ):
+                    results.append(
+                        dict(
+                            table=table_name,
+                            rows=entry["rows"],
+                            dtypes=entry["columns"],
+                            manifest=entry,
+                            unchanged=True,
+                        )
+                    )
+                    _report_progress(task, results[-1])
+                    continue
+            member = path.at if zipped else str(path)
+            arguments.append(
+                (
+                    source,
+                    member,
+                    target_folder,
+                    columnar_folder,
+                    chunksize,
+                    coded_columns,
+                )
+            )
+        if jobs > 1 and len(arguments) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = [
+                    pool.submit(convert_table, *args) for args in arguments
+                ]
+                for future in as_completed(futures):
+                    results.append(future.result())
+                    _report_progress(task, results[-1])
+        else:
+            for args in arguments:
+                results.append(convert_table(*args))
+                _report_progress(task, results[-1])
+        task.set_description("Saved all tables")
+        task.close()
+
+        # Store the schema next to the data, so loading needs no inference.
+
+        for result in results:
+            with open(schema_folder / (result["table"] + ".json"), "w") as f:
+                json.dump(table_schema(result["dtypes"], codebook), f)
+
+        # Index each row's benefit unit and household for aggregation.
+
+        build_entity_index(staging_folder)
+
+        # Describe what was saved, so it can be found without reading it.
+
+        tables = {}
+        for result in results:
+            tables[result["table"]] = dict(
+                result["manifest"], source=sources[result["table"]]
+            )
+        manifest.write_manifest(
+            staging_folder,
+            dict(year=int(year), codebook=codebook_source, tables=tables),
+        )
+
+        # Swap the new year in.
+
+        swap_in(staging_folder, year_folder)
+        manifest.record_year(DATA_PATH, year, tables)
+    finally:
+        if staging_folder.exists():
+            shutil.rmtree(staging_folder)
+        if archive is not None:
+            archive.close()
+
+
+def swap_in(staging_folder: Path, year_folder: Path) -> None:
+    """Make a complete staging folder the stored year in one atomic step.
+
+    Each save is kept in its own versioned folder (e.g. '.2018.<n>'), and
+    the year's folder is a symlink to the current version, replaced with
+    os.replace. Readers therefore see either the old or the new year, and
+    never a missing or partial one.
+
+    Args:
+        staging_folder (Path): The complete new year.
+        year_folder (Path): The stored year's path.
+    """
+    version_folder = year_folder.with_name(
+        f".{year_folder.name}.{time.time_ns()}"
+    )
+    os.rename(staging_folder, version_folder)
+    pointer = year_folder.with_name(f".{year_folder.name}.link-{os.getpid()}")
+    os.symlink(version_folder.name, pointer, target_is_directory=True)
+    replaced = None
+    if year_folder.is_symlink():
+        replaced = year_folder.parent / os.readlink(year_folder)
+    elif year_folder.exists():
+        # A year saved before versioned folders is a real folder, which a
+        # symlink cannot replace: move it aside first (only this once).
+        replaced = year_folder.with_name(
+            f".{year_folder.name}.replaced-{os.getpid()}"
+        )
+        os.rename(year_folder, replaced)
+    try:
+        os.replace(pointer, year_folder)
+    except OSError:
+        os.unlink(pointer)
+        shutil.rmtree(version_folder)
+        if replaced is not None and not year_folder.is_symlink():
+            os.rename(replaced, year_folder)
+        raise
+    if replaced is not None:
+        shutil.rmtree(replaced, ignore_errors=True)
+
+
+def source_hash(path: Path, archive: zipfile.ZipFile = None) -> str:
+    """Fingerprint the contents of a file in a UKDA download.
+
+    For a zipped download, the CRC-32 and size the zip stores for the file
+    are used, so nothing needs to be decompressed.
+
+    Args:
+        path (Path): The file (a zipfile.Path if the download is zipped).
+        archive (zipfile.ZipFile, optional): The zip file, if zipped.
+
+    Returns:
+        str: The fingerprint.
+    """
+    if archive is not None:
+        info = archive.getinfo(path.at)
+        return f"crc32:{info.CRC:08x}:{info.file_size}"
+    return "sha256:" + manifest.file_hash(path)
+
+
+def reuse_table(
+    year_folder: Path, staging_folder: Path, table: str, columns: dict
+) -> bool:
+    """Link a stored table's files into the staging folder.
+
+    Returns:
+        bool: Whether the stored table was complete, and so was reused.
+    """
+    csv_path = year_folder / "raw" / (table + ".csv")
+    columnar_folder = year_folder / "columns" / table
+    column_files = [column + ".npy" for column in columns] + [
+        storage.COLUMN_ORDER_FILE
+    ]
+    if not csv_path.exists() or not all(
+        (columnar_folder / name).exists() for name in column_files
+    ):
+        return False
+    link(csv_path, staging_folder / "raw" / (table + ".csv"))
+    os.makedirs(staging_folder / "columns" / table)
+    for name in column_files:
+        link(columnar_folder / name, staging_folder / "columns" / table / name)
+    return True
+
+
+def link(source: Path, target: Path) -> None:
+    """Hard-link a file, or copy it where links aren't supported."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
 
-    # Clean up tmp storage.
 
-    if (FRS_path / "data" / "tmp").exists():
-        shutil.rmtree(FRS_path / "data" / "tmp")
+def _report_progress(task: tqdm, result: dict) -> None:
+    if result.get("unchanged"):
+        task.set_postfix_str(f"{result['table']}: unchanged")
+        task.update(1)
+        return
+    instrument.emit(
+        dict(
+            name="save.table",
+            table=result["table"],
+            seconds=result["seconds"],
+            rows=result["rows"],
+            bytes=result["bytes"],
+            start=time.perf_counter() - result["seconds"],
+            depth=0,
+        )
+    )
+    throughput = result["bytes"] / 1e6 / max(result["seconds"], 1e-9)
+    task.set_postfix_str(
+        f"{result['table']}: {result['rows']:,} rows, {throughput:.1f} MB/s"
+    )
+    task.update(1)
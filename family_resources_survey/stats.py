@@ -0,0 +1,368 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Union
+from family_resources_survey.load import FRS, WEIGHT_VAR
+
+DECILES = np.arange(1, 10) / 10
+
+
+def group_codes(by, size: int):
+    """Number the groups of each row from 0 (or -1 for a missing group).
+
+    Returns:
+        tuple: The group code of each row, and the group labels.
+    """
+    if by is None:
+        return np.zeros(size, dtype=np.int64), pd.Index(["all"])
+    codes, labels = pd.factorize(pd.Series(by), sort=True)
+    return codes, pd.Index(labels, name=getattr(by, "name", None))
+
+
+def weighted_totals(
+    values: np.ndarray, weights: np.ndarray, codes: np.ndarray, size: int
+) -> tuple:
+    """Weighted totals of many columns by group, in one pass.
+
+    Rows are sorted by group once, and every column is then summed with a
+    single np.add.reduceat. Missing values are left out.
+
+    Args:
+        values (np.ndarray): The values, of shape (rows, columns).
+        weights (np.ndarray): The weight of each row.
+        codes (np.ndarray): The group of each row (-1 to leave a row out).
+        size (int): The number of groups.
+
+    Returns:
+        tuple: The weighted totals and the total weights with a value, each of shape (groups, columns).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    keep = codes >= 0
+    order = np.argsort(codes[keep], kind="stable")
+    codes = codes[keep][order]
+    values = values[keep][order]
+    weights = np.asarray(weights, dtype=np.float64)[keep][order, None]
+    present = ~np.isnan(values)
+    weighted = np.where(present, values * weights, 0)
+    counts = np.bincount(codes, minlength=size)
+    totals = np.zeros((size, values.shape[1]))
+    weight_totals = np.zeros((size, values.shape[1]))
+    nonempty = counts > 0
+    if nonempty.any():
+        starts = (np.cumsum(counts) - counts)[nonempty]
+        totals[nonempty] = np.add.reduceat(weighted, starts, axis=0)
+        weight_totals[nonempty] = np.add.reduceat(
+            present * weights, starts, axis=0
+        )
+    return totals, weight_totals
+
+
+def weighted_quantiles(
+    values: np.ndarray,
+    weights: np.ndarray,
+    quantiles: np.ndarray,
+    codes: np.ndarray = None,
+    size: int = 1,
+) -> np.ndarray:
+    """Weighted quantiles of a column, for every group and quantile at once.
+
+    The rows are sorted by group and value once, and every quantile of
+    every group is then found with a single np.searchsorted. The quantile
+    is the first value at which the cumulative share of weight reaches it.
+
+    Args:
+        values (np.ndarray): The values.
+        weights (np.ndarray): The weight of each row.
+        quantiles (np.ndarray): The quantiles, between 0 and 1.
+        codes (np.ndarray, optional): The group of each row (-1 to leave a row out). Defaults to one group.
+        size (int, optional): The number of groups. Defaults to 1.
+
+    Returns:
+        np.ndarray: The quantiles, of shape (groups, quantiles).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    if codes is None:
+        codes = np.zeros(len(values), dtype=np.int64)
+    keep = (codes >= 0) & ~np.isnan(values) & ~np.isnan(weights)
+    values, weights, codes = values[keep], weights[keep], codes[keep]
+    if len(values) == 0:
+        return np.full((size, len(quantiles)), np.nan)
+    order = np.lexsort((values, codes))
+    values, weights, codes = values[order], weights[order], codes[order]
+
+    counts = np.bincount(codes, minlength=size)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    cumulative = np.cumsum(weights)
+    before = np.concatenate([[0.0], cumulative])[starts]
+    group_weights = np.bincount(codes, weights=weights, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = (cumulative - before[codes]) / group_weights[codes]
+    # Group g's shares lie in (g, g + 1], so one sorted key covers them all.
+    key = codes + share
+    targets = np.arange(size)[:, None] + quantiles[None, :]
+    positions = np.searchsorted(key, targets, side="left")
+    positions = np.clip(
+        positions, starts[:, None], np.maximum(ends - 1, starts)[:, None]
+    )
+    result = values[np.minimum(positions, len(values) - 1)]
+    # Groups with no rows, or no weight, have no quantiles.
+    result[(counts == 0) | (group_weights == 0)] = np.nan
+    return result
+
+
+def weighted_deciles(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """The weighted decile (1 to 10) of each row's value (0 if missing)."""
+    values = np.asarray(values, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    keep = np.flatnonzero(~np.isnan(values) & ~np.isnan(weights))
+    order = keep[np.argsort(values[keep], kind="stable")]
+    cumulative = np.cumsum(weights[order])
+    deciles = np.zeros(len(values), dtype=np.int8)
+    if len(order) > 0:
+        share = cumulative / cumulative[-1]
+        deciles[order] = np.clip(np.ceil(share * 10), 1, 10)
+    return deciles
+
+
+def _replicate(args: tuple) -> List[np.ndarray]:
+    """Compute a statistic for a batch of bootstrap replicates."""
+    (
+        statistic,
+        values,
+        weights,
+        codes,
+        size,
+        quantiles,
+        clusters,
+        num_clusters,
+        seeds,
+    ) = args
+    results = []
+    for seed in seeds:
+        # Poisson bootstrap: each cluster is drawn a Poisson(1) number of times.
+        rng = np.random.default_rng(seed)
+        draws = rng.poisson(1, num_clusters)[clusters]
+        results.append(
+            _statistic(
+                statistic, values, weights * draws, codes, size, quantiles
+            )
+        )
+    return results
+
+
+def _statistic(
+    statistic: str,
+    values: np.ndarray,
+    weights: np.ndarray,
+    codes: np.ndarray,
+    size: int,
+    quantiles: np.ndarray = None,
+) -> np.ndarray:
+    if statistic in ("total", "mean"):
+        totals, weight_totals = weighted_totals(values, weights, codes, size)
+        if statistic == "total":
+            return totals
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return totals / weight_totals
+    if statistic == "quantile":
+        return np.stack(
+            [
+                weighted_quantiles(
+                    values[:, i], weights, quantiles, codes, size
+                )
+                for i in range(values.shape[1])
+            ],
+            axis=1,
+        )
+    raise ValueError(f"Unknown statistic: {statistic}")
+
+
+def _table_values(frs: FRS, table: str, columns: List[str], by) -> tuple:
+    df = getattr(frs, table)
+    values = np.column_stack(
+        [df[column].to_numpy(np.float64) for column in columns]
+    )
+    weights = df[WEIGHT_VAR].to_numpy(np.float64)
+    if isinstance(by, str):
+        by = df[by]
+    codes, labels = group_codes(by, len(df))
+    return df, values, weights, codes, labels
+
+
+def _frame(
+    result: np.ndarray,
+    labels: pd.Index,
+    columns: List[str],
+    quantiles: np.ndarray = None,
+    by=None,
+) -> Union[pd.DataFrame, pd.Series]:
+    if quantiles is None:
+        frame = pd.DataFrame(result, index=labels, columns=columns)
+        return frame.iloc[0] if by is None else frame
+    if by is None:
+        return pd.DataFrame(
+            result[0].T,
+            index=pd.Index(quantiles, name="quantile"),
+            columns=columns,
+        )
+    return pd.DataFrame(
+        result.reshape(len(labels), -1),
+        index=labels,
+        columns=pd.MultiIndex.from_product(
+            [columns, quantiles], names=[None, "quantile"]
+        ),
+    )
+
+
+def totals(
+    frs: FRS, table: str, columns: List[str], by=None
+) -> Union[pd.DataFrame, pd.Series]:
+    """Weighted totals of columns of a table, optionally by group.
+
+    Args:
+        frs (FRS): The survey (its weights are uprated with it).
+        table (str): The table name.
+        columns (List[str]): The columns.
+        by (optional): A column name or array of groups. Defaults to no groups.
+
+    Returns:
+        Union[pd.DataFrame, pd.Series]: The totals of each column (by group).
+    """
+    _, values, weights, codes, labels = _table_values(frs, table, columns, by)
+    result = _statistic("total", values, weights, codes, len(labels))
+    return _frame(result, labels, columns, by=by)
+
+
+def means(
+    frs: FRS, table: str, columns: List[str], by=None
+) -> Union[pd.DataFrame, pd.Series]:
+    """Weighted means of columns of a table, optionally by group.
+
+    Args:
+        frs (FRS): The survey (its weights are uprated with it).
+        table (str): The table name.
+        columns (List[str]): The columns.
+        by (optional): A column name or array of groups. Defaults to no groups.
+
+    Returns:
+        Union[pd.DataFrame, pd.Series]: The means of each column (by group).
+    """
+    _, values, weights, codes, labels = _table_values(frs, table, columns, by)
+    result = _statistic("mean", values, weights, codes, len(labels))
+    return _frame(result, labels, columns, by=by)
+
+
+def quantiles(
+    frs: FRS,
+    table: str,
+    columns: List[str],
+    q: List[float] = DECILES,
+    by=None,
+) -> pd.DataFrame:
+    """Weighted quantiles of columns of a table, optionally by group.
+
+    Each column is sorted once for all quantiles and groups.
+
+    Args:
+        frs (FRS): The survey (its weights are uprated with it).
+        table (str): The table name.
+        columns (List[str]): The columns.
+        q (List[float], optional): The quantiles. Defaults to the decile boundaries.
+        by (optional): A column name or array of groups. Defaults to no groups.
+
+    Returns:
+        pd.DataFrame: The quantiles of each column, indexed by quantile (or by group, with a column for each column and quantile).
+    """
+    q = np.asarray(q, dtype=np.float64)
+    _, values, weights, codes, labels = _table_values(frs, table, columns, by)
+    result = _statistic("quantile", values, weights, codes, len(labels), q)
+    return _frame(result, labels, columns, quantiles=q, by=by)
+
+
+def deciles(frs: FRS, table: str, column: str) -> pd.Series:
+    """The weighted decile (1 to 10) of each row of a table for a column.
+
+    Args:
+        frs (FRS): The survey (its weights are uprated with it).
+        table (str): The table name.
+        column (str): The column to rank rows by.
+
+    Returns:
+        pd.Series: The decile of each row (0 where the value is missing).
+    """
+    df = getattr(frs, table)
+    return pd.Series(
+        weighted_deciles(df[column], df[WEIGHT_VAR]),
+        index=df.index,
+        name=f"{column}_decile",
+    )
+
+
+def standard_errors(
+    frs: FRS,
+    table: str,
+    columns: List[str],
+    statistic: str = "mean",
+    q: List[float] = DECILES,
+    by=None,
+    replicates: int = 100,
+    jobs: int = 1,
+    seed: int = 0,
+) -> Union[pd.DataFrame, pd.Series]:
+    """Bootstrap standard errors of weighted statistics.
+
+    Households are resampled (by giving each a Poisson(1) number of
+    draws), so the people in a household are kept together. Replicates
+    are computed in parallel across processes.
+
+    Args:
+        frs (FRS): The survey (its weights are uprated with it).
+        table (str): The table name.
+        columns (List[str]): The columns.
+        statistic (str, optional): One of 'total', 'mean' or 'quantile'. Defaults to 'mean'.
+        q (List[float], optional): The quantiles, if the statistic is 'quantile'. Defaults to the decile boundaries.
+        by (optional): A column name or array of groups. Defaults to no groups.
+        replicates (int, optional): The number of bootstrap replicates. Defaults to 100.
+        jobs (int, optional): The number of processes to use. Defaults to 1.
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        Union[pd.DataFrame, pd.Series]: The standard errors, shaped like the statistic's results.
+    """
+    q = np.asarray(q, dtype=np.float64) if statistic == "quantile" else None
+    df, values, weights, codes, labels = _table_values(frs, table, columns, by)
+    if "sernum" in df.columns:
+        clusters, cluster_labels = pd.factorize(df.sernum.to_numpy())
+        num_clusters = len(cluster_labels)
+    else:
+        clusters, num_clusters = np.arange(len(df)), len(df)
+    seeds = np.random.SeedSequence(seed).generate_state(replicates)
+    batches = np.array_split(seeds, max(1, min(jobs, replicates)))
+    arguments = [
+        (
+            statistic,
+            values,
+            weights,
+            codes,
+            len(labels),
+            q,
+            clusters,
+            num_clusters,
+            batch,
+        )
+        for batch in batches
+    ]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = [
+                r for batch in pool.map(_replicate, arguments) for r in batch
+            ]
+    else:
+        results = [r for args in arguments for r in _replicate(args)]
+    errors = np.nanstd(np.stack(results), axis=0, ddof=1)
+    return _frame(errors, labels, columns, quantiles=q, by=by)
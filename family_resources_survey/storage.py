@@ -0,0 +1,252 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import List
+
+COLUMN_ORDER_FILE = "columns.json"
+SPILL_DTYPE = np.float64
+INTEGER_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+# Columns used in arithmetic (weights, ages, amounts) are never narrowed
+# below int32, so products such as GROSS4 * AGE80 cannot silently overflow.
+ARITHMETIC_INTEGER_DTYPES = (np.int32, np.int64)
+
+
+def write_table(df: pd.DataFrame, folder: Path) -> None:
+    """Write a table to a columnar store, with one .npy file per column.
+
+    Args:
+        df (pd.DataFrame): The (numeric) table to store.
+        folder (Path): The folder to store the columns in.
+    """
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    for column in df.columns:
+        values = df[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values, errors="coerce")
+        np.save(folder / (column + ".npy"), values.to_numpy())
+    with open(folder / COLUMN_ORDER_FILE, "w") as f:
+        json.dump(list(df.columns), f)
+
+
+class TableWriter:
+    """Writes a table to a columnar store one chunk of rows at a time.
+
+    Each chunk is spilled to a scratch file in column-major order, so that
+    on closing, each column can be gathered and written with memory bounded
+    by the chunk size and a single column.
+
+    Args:
+        folder (Path): The folder to store the columns in.
+        coded_columns (List[str], optional): The (upper-case) names of codebook-coded columns, which may be narrowed to int8 or int16.
+    """
+
+    def __init__(self, folder: Path, coded_columns: List[str] = ()):
+        self.folder = Path(folder)
+        self.coded_columns = set(coded_columns)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.spill_path = self.folder / "spill.tmp"
+        self.spill = open(self.spill_path, "wb")
+        self.columns = None
+        self.chunk_sizes = []
+        self.dtypes = {}
+
+    def append(self, chunk: pd.DataFrame) -> None:
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        block = np.empty((len(self.columns), len(chunk)), dtype=SPILL_DTYPE)
+        for i, column in enumerate(self.columns):
+            block[i] = chunk[column].to_numpy(
+                dtype=SPILL_DTYPE, na_value=np.nan
+            )
+        self.spill.write(block.tobytes())
+        self.chunk_sizes.append(len(chunk))
+
+    def close(self, columns: List[str] = None) -> int:
+        """Write the spilled chunks out as one .npy file per column.
+
+        Args:
+            columns (List[str], optional): The column names, needed if no chunks were appended.
+
+        Returns:
+            int: The number of rows written.
+        """
+        self.spill.close()
+        if self.columns is None:
+            self.columns = list(columns or [])
+        num_rows = sum(self.chunk_sizes)
+        num_columns = len(self.columns)
+        if num_rows > 0 and num_columns > 0:
+            spilled = np.memmap(self.spill_path, dtype=SPILL_DTYPE, mode="r")
+        offsets = np.cumsum(
+            [0] + [size * num_columns for size in self.chunk_sizes]
+        )
+        for i, column in enumerate(self.columns):
+            values = np.empty(num_rows, dtype=SPILL_DTYPE)
+            row = 0
+            for offset, size in zip(offsets, self.chunk_sizes):
+                values[row : row + size] = spilled[
+                    offset + i * size : offset + (i + 1) * size
+                ]
+                row += size
+            dtype = narrowest_dtype(
+                values, coded=column.upper() in self.coded_columns
+            )
+            values = values.astype(dtype, copy=False)
+            self.dtypes[column] = values.dtype.name
+            np.save(self.folder / (column + ".npy"), values)
+        if num_rows > 0 and num_columns > 0:
+            del spilled
+        self.spill_path.unlink()
+        with open(self.folder / COLUMN_ORDER_FILE, "w") as f:
+            json.dump(self.columns, f)
+        return num_rows
+
+
+def narrowest_dtype(values: np.ndarray, coded: bool = False) -> np.dtype:
+    """Find the narrowest type which can hold the values without loss.
+
+    Args:
+        values (np.ndarray): The (float) values.
+        coded (bool, optional): Whether the values are codebook codes, which may use int8 or int16. Defaults to False.
+
+    Returns:
+        np.dtype: The smallest integer type if the values are all whole
+        numbers, otherwise float32 if that is exact, otherwise float64.
+    """
+    integer_dtypes = INTEGER_DTYPES if coded else ARITHMETIC_INTEGER_DTYPES
+    if len(values) == 0:
+        return np.dtype(integer_dtypes[0])
+    finite = np.isfinite(values)
+    if finite.all() and (np.floor(values) == values).all():
+        lowest, highest = values.min(), values.max()
+        for dtype in integer_dtypes:
+            info = np.iinfo(dtype)
+            if info.min <= lowest and highest <= info.max:
+                return np.dtype(dtype)
+    with np.errstate(over="ignore"):
+        as_float32 = values.astype(np.float32)
+    if np.array_equal(as_float32, values, equal_nan=True):
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def has_table(folder: Path) -> bool:
+    return (Path(folder) / COLUMN_ORDER_FILE).exists()
+
+
+def table_columns(folder: Path) -> List[str]:
+    with open(Path(folder) / COLUMN_ORDER_FILE) as f:
+        return json.load(f)
+
+
+def read_table(
+    folder: Path, columns: List[str] = None, mmap: bool = True
+) -> pd.DataFrame:
+    """Read a table from a columnar store.
+
+    Only the requested columns are opened. With mmap, each column is a
+    copy-on-write memory map of its file, so pages are only read from disk
+    when the values are used, and writes to the table stay private to it
+    rather than reaching the file.
+
+    Args:
+        folder (Path): The folder the columns are stored in.
+        columns (List[str], optional): The columns to read. Defaults to all.
+        mmap (bool, optional): Whether to memory-map the columns. Defaults to True.
+
+    Raises:
+        ValueError: If a requested column is not stored.
+
+    Returns:
+        pd.DataFrame: The table.
+    """
+    folder = Path(folder)
+    stored = table_columns(folder)
+    if columns is None:
+        columns = stored
+    else:
+        missing = set(columns) - set(stored)
+        if len(missing) > 0:
+            raise ValueError(
+                f"Columns not found in the stored table: {sorted(missing)}"
+            )
+        # Keep the stored column order, as pd.read_csv(usecols=...) does.
+        requested = set(columns)
+        columns = [column for column in stored if column in requested]
+    mmap_mode = "c" if mmap else None
+    data = {
+        column: np.load(folder / (column + ".npy"), mmap_mode=mmap_mode)
+        for column in columns
+    }
+    return pd.DataFrame(data, columns=columns, copy=False)
+
+
+def column_bytes(folder: Path, columns: List[str]) -> int:
+    """The size on disk of some columns of a stored table."""
+    return sum(
+        os.path.getsize(Path(folder) / (column + ".npy")) for column in columns
+    )
+
+
+def num_rows(folder: Path) -> int:
+    """The number of rows in a stored table, read from a column header."""
+    columns = table_columns(folder)
+    if len(columns) == 0:
+        return 0
+    return len(np.load(Path(folder) / (columns[0] + ".npy"), mmap_mode="r"))
+
+
+def read_rows(
+    folder: Path, columns: List[str], rows: np.ndarray
+) -> pd.DataFrame:
+    """Read some rows of some columns of a stored table into memory.
+
+    Args:
+        folder (Path): The folder the columns are stored in.
+        columns (List[str]): The columns to read.
+        rows (np.ndarray): The (sorted) row numbers to read.
+
+    Returns:
+        pd.DataFrame: The rows, indexed by their row numbers.
+    """
+    folder = Path(folder)
+    if len(rows) > 0 and rows[-1] - rows[0] + 1 == len(rows):
+        # A contiguous range can be sliced rather than gathered.
+        rows = slice(rows[0], rows[-1] + 1)
+        index = pd.RangeIndex(rows.start, rows.stop)
+    else:
+        index = pd.Index(rows)
+    data = {
+        column: np.array(
+            np.load(folder / (column + ".npy"), mmap_mode="r")[rows]
+        )
+        for column in columns
+    }
+    return pd.DataFrame(data, index=index, columns=columns, copy=False)
+
+
+def cache_table(csv_path: Path, folder: Path, dtype: dict = None) -> None:
+    """Decode a CSV table into a columnar store, safely across processes.
+
+    The table is written to a private folder first and then renamed into
+    place, so concurrent callers never see a partial table: if another
+    process gets there first, its copy is kept.
+
+    Args:
+        csv_path (Path): The CSV file.
+        folder (Path): The folder to store the columns in.
+        dtype (dict, optional): The column types to read the CSV with.
+    """
+    folder = Path(folder)
+    folder.parent.mkdir(parents=True, exist_ok=True)
+    staging = folder.parent / f".{folder.name}.{os.getpid()}.tmp"
+    df = pd.read_csv(csv_path, dtype=dtype, low_memory=False)
+    write_table(df, staging)
+    try:
+        os.rename(staging, folder)
+    except OSError:
+        shutil.rmtree(staging)
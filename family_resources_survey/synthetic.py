@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+import shutil
+from pathlib import Path
+
+REGIONS = {
+    1: "North East",
+    2: "North West",
+    4: "Yorkshire and the Humber",
+    5: "East Midlands",
+    6: "West Midlands",
+    7: "East of England",
+    8: "London",
+    9: "South East",
+    10: "South West",
+    11: "Wales",
+    12: "Scotland",
+    13: "Northern Ireland",
+}
+SEXES = {1: "Male", 2: "Female"}
+# The UKDA codebook labels a few codes of numeric columns too.
+AGES = {80: "80 or over"}
+WEIGHTS = {0: "Not weighted"}
+TENURES = {
+    1: "Rented from Council",
+    2: "Rented from Housing Association",
+    3: "Rented privately unfurnished",
+    4: "Rented privately furnished",
+    5: "Owned outright",
+    6: "Owned with a mortgage",
+}
+BENEFITS = {
+    1: "Disability Living Allowance",
+    2: "Retirement Pension",
+    3: "Child Benefit",
+    4: "Housing Benefit",
+    5: "Universal Credit",
+}
+
+
+def generate(
+    folder: str,
+    households: int = 1000,
+    extra_columns: int = 50,
+    seed: int = 0,
+    zipped: bool = False,
+) -> Path:
+    """Write a synthetic FRS download, shaped like the UK Data Archive's.
+
+    The download holds a 'tab' folder of tab-separated tables (househol,
+    benunit, adult, child and benefits) with nested sernum, BENUNIT and
+    PERSON keys, and an Excel codebook in 'mrdoc/excel'. The values are
+    random: this is for testing and benchmarking, not analysis.
+
+    Args:
+        folder (str): The folder to write the download to.
+        households (int, optional): The number of households. Defaults to 1000.
+        extra_columns (int, optional): The number of filler coded columns per table, for realistic widths. Defaults to 50.
+        seed (int, optional): The random seed. Defaults to 0.
+        zipped (bool, optional): Whether to zip the download. Defaults to False.
+
+    Returns:
+        Path: The download folder, or the zip file if zipped.
+    """
+    rng = np.random.default_rng(seed)
+    folder = Path(folder)
+    main_folder = folder / "UKDA-0000-tab"
+    (main_folder / "tab").mkdir(parents=True, exist_ok=True)
+    (main_folder / "mrdoc" / "excel").mkdir(parents=True, exist_ok=True)
+
+    # Households hold one or two benefit units, each with one or two adults
+    # and up to two children, so PERSON stays a single digit as the entity
+    # IDs assume.
+
+    sernum = np.arange(1, households + 1)
+    household_weight = rng.integers(500, 4000, households)
+    benunits_per_household = rng.choice([1, 2], households, p=[0.85, 0.15])
+    benunit_sernum = np.repeat(sernum, benunits_per_household)
+    benunit = _number_within(benunits_per_household)
+    num_benunits = len(benunit_sernum)
+    benunit_weight = np.repeat(household_weight, benunits_per_household)
+    adults_per_benunit = rng.choice([1, 2], num_benunits, p=[0.4, 0.6])
+    children_per_benunit = rng.choice(
+        [0, 1, 2], num_benunits, p=[0.6, 0.25, 0.15]
+    )
+    people_per_benunit = adults_per_benunit + children_per_benunit
+    people_per_household = np.bincount(
+        np.repeat(np.arange(households), benunits_per_household),
+        weights=people_per_benunit,
+    ).astype(int)
+    person_benunit = np.repeat(np.arange(num_benunits), people_per_benunit)
+    is_adult = _number_within(people_per_benunit) <= np.repeat(
+        adults_per_benunit, people_per_benunit
+    )
+    person_sernum = benunit_sernum[person_benunit]
+    person = _number_within(people_per_household)
+    adult_rows = np.flatnonzero(is_adult)
+    child_rows = np.flatnonzero(~is_adult)
+    num_adults = len(adult_rows)
+    num_children = len(child_rows)
+
+    househol = pd.DataFrame(
+        {
+            "sernum": sernum,
+            "GROSS4": household_weight,
+            "GVTREGN": rng.choice(list(REGIONS), households),
+            "TENURE": rng.choice(list(TENURES), households),
+            "HHINC": rng.gamma(2, 300, households).round(2),
+        }
+    )
+    benunit_table = pd.DataFrame(
+        {
+            "sernum": benunit_sernum,
+            "BENUNIT": benunit,
+            "GROSS4": benunit_weight,
+            "BUINC": rng.gamma(2, 250, num_benunits).round(2),
+        }
+    )
+    earnings = rng.lognormal(6, 0.8, num_adults).round(2)
+    employed = rng.random(num_adults) < 0.6
+    adult = pd.DataFrame(
+        {
+            "sernum": person_sernum[adult_rows],
+            "BENUNIT": benunit[person_benunit[adult_rows]],
+            "PERSON": person[adult_rows],
+            "AGE80": rng.integers(16, 81, num_adults),
+            "SEX": rng.choice(list(SEXES), num_adults),
+            "GROSS4": benunit_weight[person_benunit[adult_rows]],
+            "INEARNS": np.where(employed, earnings, 0),
+            "NINEARNS": np.where(employed, earnings * 0.8, 0).round(2),
+            "UGRSPAY": np.where(employed, earnings * 4.33, 0).round(2),
+            "SEINCAM2": np.where(
+                rng.random(num_adults) < 0.1,
+                rng.lognormal(5, 1, num_adults).round(2),
+                0,
+            ),
+            # Blank in the download for most adults.
+            "EMPSTATI": np.where(
+                employed, rng.integers(1, 4, num_adults).astype(str), " "
+            ),
+        }
+    )
+    child = pd.DataFrame(
+        {
+            "sernum": person_sernum[child_rows],
+            "BENUNIT": benunit[person_benunit[child_rows]],
+            "PERSON": person[child_rows],
+            "AGE": rng.integers(0, 16, num_children),
+            "SEX": rng.choice(list(SEXES), num_children),
+            "GROSS4": benunit_weight[person_benunit[child_rows]],
+        }
+    )
+    receives = adult.sample(frac=0.4, random_state=seed).sort_index()
+    benefits = pd.DataFrame(
+        {
+            "sernum": receives.sernum.values,
+            "BENUNIT": receives.BENUNIT.values,
+            "PERSON": receives.PERSON.values,
+            "BENEFIT": rng.choice(list(BENEFITS), len(receives)),
+            "BENAMT": rng.gamma(2, 40, len(receives)).round(2),
+        }
+    )
+    tables = dict(
+        househol=househol,
+        benunit=benunit_table,
+        adult=adult,
+        child=child,
+        benefits=benefits,
+    )
+    filler_codes = {}
+    for name, table in tables.items():
+        for i in range(extra_columns):
+            column = f"{name.upper()}X{i:03d}"
+            num_codes = int(rng.integers(2, 10))
+            table[column] = rng.integers(1, num_codes + 1, len(table))
+            filler_codes[column] = {
+                code: f"Category {code}" for code in range(1, num_codes + 1)
+            }
+        table.to_csv(
+            main_folder / "tab" / (name + ".tab"), sep="\t", index=False
+        )
+
+    write_codebook(
+        main_folder / "mrdoc" / "excel" / "frs_hierarchical_benv_income.xlsx",
+        tables,
+        dict(
+            GVTREGN=REGIONS,
+            TENURE=TENURES,
+            SEX=SEXES,
+            AGE80=AGES,
+            GROSS4=WEIGHTS,
+            BENEFIT=BENEFITS,
+            **filler_codes,
+        ),
+    )
+    if zipped:
+        archive = shutil.make_archive(str(folder), "zip", folder)
+        shutil.rmtree(folder)
+        return Path(archive)
+    return folder
+
+
+def write_codebook(path: Path, tables: dict, codemaps: dict) -> None:
+    """Write an Excel codebook in the layout of the UKDA's.
+
+    Each variable's first row holds its name and description, and its
+    decodes run down the VALUE and DECODE columns from that row.
+    """
+    rows = []
+    for name, table in tables.items():
+        for column in table.columns:
+            description = f"{column} ({name} table)"
+            codes = list(codemaps.get(column, {}).items())
+            first_value, first_decode = codes[0] if codes else (None, None)
+            rows.append((column, description, first_value, first_decode))
+            rows += [
+                (None, None, value, decode) for value, decode in codes[1:]
+            ]
+    pd.DataFrame(
+        rows,
+        columns=["VARIABLE", "DESCRIPTION (SAS LABEL)", "VALUE", "DECODE"],
+    ).to_excel(path, sheet_name="VARIABLE LISTING", index=False)
+
+
+def _number_within(group_sizes: np.ndarray) -> np.ndarray:
+    """Number the members of consecutive groups from 1."""
+    group_sizes = np.asarray(group_sizes)
+    starts = np.repeat(np.cumsum(group_sizes) - group_sizes, group_sizes)
+    return np.arange(group_sizes.sum()) - starts + 1
@@ -10,7 +10,7 @@ setup(
     author="Nikhil Woodruff",
     author_email="nikhil.woodruff@outlook.com",
     packages=find_packages(),
-    install_requires=["pandas", "openpyxl", "xlrd", "tqdm"],
+    install_requires=["numpy", "pandas", "openpyxl", "xlrd", "tqdm"],
     entry_points={
         "console_scripts": ["frs-data=family_resources_survey.main:main"],
     },
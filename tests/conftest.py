@@ -0,0 +1,35 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# The data folder is read when the package is imported, so it is set here,
+# before any test module imports it.
+WORKSPACE = Path(tempfile.mkdtemp(prefix="frs-tests-"))
+os.environ["FRS_DATA_PATH"] = str(WORKSPACE / "data")
+
+YEAR = 2018
+TABLES = ["househol", "benunit", "adult", "child", "benefits"]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def workspace():
+    yield WORKSPACE
+    shutil.rmtree(WORKSPACE, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def download(workspace):
+    """A synthetic download, saved as YEAR."""
+    from family_resources_survey.save import save
+    from family_resources_survey.synthetic import generate
+
+    folder = generate(workspace / "download", households=500, extra_columns=3)
+    save(folder, YEAR, zipped=False)
+    return folder
+
+
+def tab_file(download: Path, table: str) -> Path:
+    return download / "UKDA-0000-tab" / "tab" / (table + ".tab")
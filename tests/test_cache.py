@@ -0,0 +1,74 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from family_resources_survey import FRS
+from family_resources_survey.cache import TableCache, frame_bytes
+from family_resources_survey.load import load
+from family_resources_survey.save import DATA_PATH
+
+from conftest import YEAR
+
+CSV_YEAR = 2011
+
+
+def table(rows: int) -> pd.DataFrame:
+    return pd.DataFrame(dict(x=np.zeros(rows)))
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TableCache(max_bytes=2 * 800)
+    cache.put("a", table(100))
+    cache.put("b", table(100))
+    cache["a"]
+    cache.put("c", table(100))
+    assert list(cache) == ["a", "c"]
+    assert cache.stats == dict(
+        hits=1, misses=0, evictions=1, bytes=1600, entries=2, max_bytes=1600
+    )
+    assert "b" not in cache
+
+
+def test_derived_tables_are_evicted_with_their_base():
+    cache = TableCache(max_bytes=3 * 800)
+    cache.put("a", table(100))
+    cache.put(("a", 1), table(100), base="a")
+    cache.put("b", table(100))
+    # Using the derived table keeps its base from being evicted first.
+    cache[("a", 1)]
+    cache.put("c", table(100))
+    assert list(cache) == ["a", ("a", 1), "c"]
+    cache.put("d", table(200))
+    assert list(cache) == ["c", "d"]
+    assert cache.bytes == 2400
+    assert cache.evictions == 3
+
+
+def test_memory_mapped_columns_are_not_counted(download):
+    adult = load(YEAR, "adult", add_entity_ids=False)
+    assert frame_bytes(adult) == 0
+    in_memory = load(YEAR, "adult", add_entity_ids=False, mmap=False)
+    assert frame_bytes(in_memory) == in_memory.memory_usage(index=False).sum()
+
+
+def test_frs_cache_stays_within_budget(download):
+    entity_ids = frame_bytes(load(YEAR, "adult"))
+    frs = FRS(2022, cache_bytes=entity_ids)
+    for name in ("adult", "child", "benunit", "adult"):
+        getattr(frs, name)
+    stats = frs.cache_stats
+    assert stats["evictions"] > 0
+    assert stats["bytes"] == sum(frs.tables.sizes.values())
+    assert stats["bytes"] <= entity_ids + max(frs.tables.sizes.values())
+
+
+def test_shared_cache_for_csv_years(download):
+    shutil.copytree(
+        DATA_PATH / str(YEAR) / "raw", DATA_PATH / str(CSV_YEAR) / "raw"
+    )
+    expected = load(CSV_YEAR, "adult")
+    shared = load(CSV_YEAR, "adult", shared=True)
+    assert (DATA_PATH / str(CSV_YEAR) / "cache" / "adult").exists()
+    assert frame_bytes(shared[["AGE80"]]) == 0
+    np.testing.assert_array_equal(shared.to_numpy(), expected.to_numpy())
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from family_resources_survey import FRS
+from family_resources_survey.load import iter_chunks, load
+
+from conftest import YEAR
+
+UPRATED_YEAR = 2022
+
+
+def test_chunks_match_the_table(download):
+    adult = load(YEAR, "adult")
+    chunks = pd.concat(iter_chunks(YEAR, "adult", chunksize=100))
+    assert list(chunks.columns) == list(adult.columns)
+    np.testing.assert_array_equal(chunks.to_numpy(), adult.to_numpy())
+
+
+def test_where_filters_while_reading(download):
+    adult = load(YEAR, "adult")
+    expected = adult[adult.AGE80 >= 65]
+    by_expression = pd.concat(
+        iter_chunks(
+            YEAR, "adult", ["INEARNS"], chunksize=100, where="AGE80 >= 65"
+        )
+    )
+    assert list(by_expression.columns) == [
+        "INEARNS",
+        "person_id",
+        "benunit_id",
+        "household_id",
+    ]
+    assert list(by_expression.index) == list(expected.index)
+    np.testing.assert_array_equal(by_expression.INEARNS, expected.INEARNS)
+    by_function = pd.concat(
+        iter_chunks(
+            YEAR,
+            "adult",
+            ["AGE80"],
+            chunksize=100,
+            where=lambda chunk: chunk.AGE80 >= 65,
+            add_entity_ids=False,
+        )
+    )
+    assert list(by_function.index) == list(expected.index)
+
+
+def test_uprated_chunks_match_the_uprated_table(download):
+    frs = FRS(UPRATED_YEAR)
+    adult = frs.adult
+    chunks = pd.concat(
+        frs.iter_chunks("adult", ["GROSS4", "INEARNS"], chunksize=100)
+    )
+    np.testing.assert_allclose(chunks.GROSS4, adult.GROSS4)
+    np.testing.assert_allclose(chunks.INEARNS, adult.INEARNS)
+
+
+def test_uprated_chunks_of_age_only(download):
+    frs = FRS(UPRATED_YEAR)
+    chunks = list(frs.iter_chunks("adult", ["AGE80"], chunksize=100))
+    ages = pd.concat(chunks)
+    assert list(ages.columns[:1]) == ["AGE80"]
+    np.testing.assert_array_equal(ages.AGE80, load(YEAR, "adult").AGE80)
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from family_resources_survey import FRS
+from family_resources_survey.save import DATA_PATH, parse_codebook
+
+from conftest import YEAR
+
+
+def test_parse_codebook(download):
+    codebook = parse_codebook(download / "UKDA-0000-tab")
+    assert codebook["SEX"]["codemap"] == {1.0: "Male", 2.0: "Female"}
+    assert codebook["SEX"]["description"] == "SEX (adult table)"
+    assert "codemap" not in codebook["INEARNS"]
+    assert all(isinstance(name, str) for name in codebook)
+
+
+def test_variables_are_read_lazily_from_the_index(download):
+    variables = FRS(YEAR).variables
+    assert variables._index is None
+    assert variables["SEX"]["1.0"] == "Male"
+    assert variables._codebook is None
+    with open(DATA_PATH / str(YEAR) / "codebook.json") as f:
+        codebook = json.load(f)
+    assert len(variables) == len(codebook)
+    for name, entry in codebook.items():
+        assert variables[name].description == entry["description"]
+        assert variables[name].codemap == entry.get("codemap", {})
+    with pytest.raises(KeyError):
+        variables["NOPE"]
@@ -0,0 +1,36 @@
+import numpy as np
+
+from family_resources_survey import FRS
+from family_resources_survey.load import load
+
+from conftest import YEAR
+
+
+def test_numeric_columns_are_not_narrowed(download):
+    # AGE80 and GROSS4 have codemaps in the synthetic codebook, as in the
+    # UKDA's, but are used as numbers.
+    adult = load(YEAR, "adult")
+    assert adult.GROSS4.dtype.itemsize >= 4
+    assert adult.AGE80.dtype.itemsize >= 4
+    assert (adult.GROSS4 * adult.AGE80).min() > 0
+    assert (adult.AGE80 * 12).min() >= 16 * 12
+
+
+def test_coded_columns_are_narrowed(download):
+    adult = load(YEAR, "adult")
+    assert adult.SEX.dtype == np.int8
+    assert adult.ADULTX000.dtype == np.int8
+
+
+def test_entity_ids_are_int64(download):
+    adult = load(YEAR, "adult")
+    for column in ("person_id", "benunit_id", "household_id"):
+        assert adult[column].dtype == np.int64
+    assert adult.person_id.is_unique
+
+
+def test_categorical_decodes_coded_columns_only(download):
+    adult = FRS(YEAR, categorical=True).adult
+    assert set(adult.SEX.cat.categories) == {"Male", "Female"}
+    assert adult.AGE80.dtype.kind == "i"
+    assert adult.GROSS4.dtype.kind == "i"
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from family_resources_survey import FRS
+
+from conftest import YEAR
+
+
+@pytest.mark.parametrize(
+    "to,table,key",
+    [
+        ("household", "househol", "household_id"),
+        ("benunit", "benunit", "benunit_id"),
+    ],
+)
+@pytest.mark.parametrize("how", ["sum", "mean", "count", "max"])
+def test_aggregate_matches_groupby(download, to, table, key, how):
+    frs = FRS(YEAR)
+    aggregated = frs.aggregate("adult", "INEARNS", to=to, how=how)
+    grouped = frs.adult.groupby(key).INEARNS.agg(how)
+    expected = grouped.reindex(getattr(frs, table)[key])
+    if how in ("sum", "count"):
+        expected = expected.fillna(0)
+    np.testing.assert_allclose(aggregated.to_numpy(), expected.to_numpy())
+
+
+def test_broadcast_gives_each_person_their_household_value(download):
+    frs = FRS(YEAR)
+    househol = frs.househol
+    broadcast = frs.broadcast(househol.HHINC, "adult")
+    expected = (
+        househol.set_index("household_id")
+        .HHINC.reindex(frs.adult.household_id)
+        .to_numpy()
+    )
+    np.testing.assert_allclose(broadcast.to_numpy(), expected)
@@ -0,0 +1,25 @@
+import numpy as np
+
+from family_resources_survey.load import load
+from family_resources_survey.save import save
+from family_resources_survey.synthetic import generate
+
+from conftest import TABLES, YEAR
+
+ZIPPED_YEAR = 2010
+
+
+def test_zipped_parallel_chunked_ingest_matches(download, workspace):
+    archive = generate(
+        workspace / "zipped", households=500, extra_columns=3, zipped=True
+    )
+    save(archive, ZIPPED_YEAR, zipped=True, jobs=2, chunksize=100)
+    for table in TABLES:
+        expected = load(YEAR, table)
+        df = load(ZIPPED_YEAR, table)
+        assert list(df.columns) == list(expected.columns)
+        assert (df.dtypes == expected.dtypes).all(), table
+        for column in df.columns:
+            np.testing.assert_array_equal(
+                df[column].to_numpy(), expected[column].to_numpy()
+            )
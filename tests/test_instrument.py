@@ -0,0 +1,84 @@
+import json
+import sys
+import threading
+
+from family_resources_survey import FRS, instrument
+from family_resources_survey.main import main
+
+from conftest import YEAR
+
+
+def test_stages_are_free_without_hooks():
+    assert instrument.stage("test") is instrument.NULL_STAGE
+    assert not instrument.stage("test")
+
+
+def test_stages_report_to_hooks(download, workspace):
+    records = []
+    log = workspace / "stages.jsonl"
+    hooks = [records.append, instrument.json_log(log)]
+    for hook in hooks:
+        instrument.add_hook(hook)
+    try:
+        with instrument.stage("outer", table="adult") as outer:
+            outer.record(rows=3)
+            FRS(YEAR).adult
+    finally:
+        for hook in hooks:
+            instrument.remove_hook(hook)
+    names = [record["name"] for record in records]
+    assert names[-1] == "outer"
+    assert {"frs.init", "frs.load", "load.read"} <= set(names)
+    assert records[-1]["rows"] == 3 and records[-1]["depth"] == 0
+    read = next(record for record in records if record["name"] == "load.read")
+    assert read["depth"] == 2 and read["bytes"] > 0 and read["rows"] > 0
+    with open(log) as f:
+        assert [json.loads(line)["name"] for line in f] == names
+
+
+def test_stage_depths_are_kept_per_thread():
+    records = []
+    instrument.add_hook(records.append)
+    started = threading.Barrier(2)
+
+    def nest(name: str) -> None:
+        with instrument.stage(name):
+            started.wait()
+            with instrument.stage(name + ".inner"):
+                started.wait()
+
+    try:
+        threads = [
+            threading.Thread(target=nest, args=(name,)) for name in "ab"
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        instrument.remove_hook(records.append)
+    depths = {record["name"]: record["depth"] for record in records}
+    assert depths == {"a": 0, "b": 0, "a.inner": 1, "b.inner": 1}
+
+
+def test_profile_command(download, monkeypatch, capsys):
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["frs-data", "profile", "--year", str(YEAR), "--table", "adult"],
+    )
+    main()
+    output = capsys.readouterr().out
+    lines = output.splitlines()
+    assert lines[0].split() == [
+        "stage",
+        "seconds",
+        "rows",
+        "MB",
+        "read",
+        "peak",
+        "MB",
+    ]
+    assert lines[1].split()[0] == "total"
+    assert any(line.strip().startswith("load.read") for line in lines)
+    assert instrument.hooks == []
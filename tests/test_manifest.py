@@ -0,0 +1,59 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from family_resources_survey import FRS, manifest
+from family_resources_survey.load import load
+
+from conftest import TABLES, YEAR
+
+
+def test_frs_answers_from_the_manifest(download):
+    frs = FRS(YEAR)
+    assert sorted(frs.table_names) == sorted(TABLES)
+    for table in TABLES:
+        df = load(YEAR, table, add_entity_ids=False)
+        assert frs.nrows(table) == len(df)
+        assert frs.columns(table) == {
+            column: dtype.name for column, dtype in df.dtypes.items()
+        }
+
+
+def test_available_years_are_read_from_the_manifest(workspace):
+    data = workspace / "manifest-years"
+    for year in (2015, 2016, 2017):
+        (data / str(year)).mkdir(parents=True)
+    # Saved before manifests were written, so found from the folders.
+    assert manifest.available_years(data) == [2015, 2016, 2017]
+    manifest.record_year(data, 2017, {})
+    (data / "2018").mkdir()
+    assert manifest.available_years(data) == [2015, 2016, 2017]
+    (data / "2015").rmdir()
+    assert manifest.available_years(data) == [2016, 2017]
+
+
+def test_concurrent_saves_keep_every_year(workspace):
+    data = workspace / "concurrent"
+    years = list(range(2000, 2040))
+    for year in years:
+        (data / str(year)).mkdir(parents=True)
+    manifest.record_year(data, years[0], {})
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(
+            pool.map(
+                lambda year: manifest.record_year(data, year, {}), years[1:]
+            )
+        )
+    assert manifest.available_years(data) == years
+    assert not (data / manifest.LOCK_FILE).exists()
+
+
+def test_a_lock_left_behind_is_broken(workspace):
+    data = workspace / "stale"
+    (data / "2018").mkdir(parents=True)
+    lock = data / manifest.LOCK_FILE
+    lock.touch()
+    stale = time.time() - manifest.LOCK_TIMEOUT - 1
+    os.utime(lock, (stale, stale))
+    manifest.record_year(data, 2018, {})
+    assert manifest.available_years(data) == [2018]
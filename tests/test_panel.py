@@ -0,0 +1,37 @@
+import numpy as np
+
+from family_resources_survey import FRS
+from family_resources_survey.load import load
+
+from conftest import YEAR
+
+UPRATED_YEAR = 2022
+
+
+def test_panel_stacks_years(download):
+    panel = FRS.panel([YEAR, UPRATED_YEAR], "adult", ["AGE80", "GROSS4"])
+    rows = len(load(YEAR, "adult"))
+    assert list(panel.columns) == ["year", "AGE80", "GROSS4"]
+    assert panel.groupby("year").size().to_dict() == {
+        YEAR: rows,
+        UPRATED_YEAR: rows,
+    }
+    uprated = FRS(UPRATED_YEAR).load_table("adult", ["AGE80", "GROSS4"])
+    np.testing.assert_allclose(
+        panel[panel.year == UPRATED_YEAR].GROSS4, uprated.GROSS4
+    )
+
+
+def test_panel_projects_age_without_weights(download):
+    panel = FRS.panel([YEAR, UPRATED_YEAR], "adult", ["AGE80"])
+    assert list(panel.columns) == ["year", "AGE80"]
+    assert (panel.AGE80 >= 16).all()
+
+
+def test_panel_fills_missing_columns_with_nan(download):
+    rows = len(load(YEAR, "adult"))
+    panel = FRS.panel([YEAR, UPRATED_YEAR], "adult", ["AGE80", "NOPE"])
+    assert panel.NOPE.isna().all()
+    missing = FRS.panel([YEAR, UPRATED_YEAR], "adult", ["NOPE"])
+    assert missing.shape == (2 * rows, 2)
+    assert missing.NOPE.isna().all()
@@ -0,0 +1,100 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import family_resources_survey.save as save_module
+from family_resources_survey.load import load
+from family_resources_survey.save import DATA_PATH, save
+from family_resources_survey.synthetic import write_codebook
+
+from conftest import TABLES, YEAR, tab_file
+
+CODEBOOK = Path(
+    "UKDA-0000-tab", "mrdoc", "excel", "frs_hierarchical_benv_income.xlsx"
+)
+
+
+def stored_inodes(table: str) -> dict:
+    folder = DATA_PATH / str(YEAR) / "columns" / table
+    return {path.name: path.stat().st_ino for path in folder.iterdir()}
+
+
+def test_unchanged_resave_reuses_files(download):
+    before = {table: stored_inodes(table) for table in TABLES}
+    save(download, YEAR, zipped=False)
+    after = {table: stored_inodes(table) for table in TABLES}
+    assert after == before
+
+
+def test_changed_table_is_converted_and_swapped_in(download, workspace):
+    before = {table: stored_inodes(table) for table in TABLES}
+    shutil.copy(tab_file(download, "child"), workspace / "child.tab")
+    child = pd.read_csv(tab_file(download, "child"), sep="\t")
+    try:
+        child.iloc[:-1].to_csv(
+            tab_file(download, "child"), sep="\t", index=False
+        )
+        save(download, YEAR, zipped=False)
+        after = {table: stored_inodes(table) for table in TABLES}
+        assert len(load(YEAR, "child")) == len(child) - 1
+    finally:
+        shutil.copy(workspace / "child.tab", tab_file(download, "child"))
+        save(download, YEAR, zipped=False)
+    assert after["child"] != before["child"]
+    assert all(
+        after[table] == before[table] for table in TABLES if table != "child"
+    )
+    year_folder = DATA_PATH / str(YEAR)
+    assert year_folder.is_symlink()
+    versions = [
+        path
+        for path in DATA_PATH.iterdir()
+        if path.name.startswith(f".{YEAR}.")
+    ]
+    assert versions == [year_folder.resolve()]
+
+
+def test_codebook_change_converts_tables_again(download, workspace):
+    shutil.copy(download / CODEBOOK, workspace / "codebook.xlsx")
+    tables = {
+        table: pd.read_csv(tab_file(download, table), sep="\t")
+        for table in TABLES
+    }
+    try:
+        # Without codemaps, no column is coded, so none is narrowed.
+        write_codebook(download / CODEBOOK, tables, {})
+        save(download, YEAR, zipped=False)
+        assert load(YEAR, "adult").SEX.dtype == np.int32
+    finally:
+        shutil.copy(workspace / "codebook.xlsx", download / CODEBOOK)
+        save(download, YEAR, zipped=False)
+    assert load(YEAR, "adult").SEX.dtype == np.int8
+
+
+def test_failed_save_leaves_year_intact(download, workspace, monkeypatch):
+    before = load(YEAR, "adult")
+    # Change a table, so that it is converted again before the failure.
+    shutil.copy(tab_file(download, "adult"), workspace / "adult.tab")
+    with open(tab_file(download, "adult")) as f:
+        last_line = f.read().splitlines()[-1]
+    with open(tab_file(download, "adult"), "a") as f:
+        f.write(last_line + "\n")
+
+    def fail(*args):
+        raise RuntimeError("Save interrupted.")
+
+    monkeypatch.setattr(save_module, "build_entity_index", fail)
+    try:
+        with pytest.raises(RuntimeError):
+            save(download, YEAR, zipped=False)
+    finally:
+        shutil.copy(workspace / "adult.tab", tab_file(download, "adult"))
+    after = load(YEAR, "adult")
+    pd.testing.assert_frame_equal(after, before)
+    assert not any(
+        path.name.startswith(f".{YEAR}.staging")
+        for path in DATA_PATH.iterdir()
+    )
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from family_resources_survey import FRS, stats
+
+from conftest import YEAR
+
+
+def naive_quantile(values, weights, q):
+    keep = ~np.isnan(values)
+    values, weights = values[keep], weights[keep]
+    if weights.sum() == 0:
+        return np.nan
+    order = np.argsort(values, kind="stable")
+    shares = np.cumsum(weights[order]) / weights.sum()
+    for value, share in zip(values[order], shares):
+        if share >= q - 1e-12:
+            return value
+    return values[order][-1]
+
+
+def test_quantiles_match_naive(download):
+    frs = FRS(YEAR)
+    adult = frs.adult
+    q = [0, 0.1, 0.25, 0.5, 0.9, 1]
+    result = stats.quantiles(frs, "adult", ["INEARNS", "AGE80"], q, by="SEX")
+    weights = adult.GROSS4.to_numpy(np.float64)
+    for sex in result.index:
+        rows = (adult.SEX == sex).to_numpy()
+        for column in ["INEARNS", "AGE80"]:
+            values = adult[column].to_numpy(np.float64)
+            for quantile in q:
+                assert result.loc[sex, (column, quantile)] == naive_quantile(
+                    values[rows], weights[rows], quantile
+                )
+
+
+def test_quantiles_of_missing_values_are_nan():
+    result = stats.weighted_quantiles(
+        np.array([np.nan, np.nan, 1.0, 2.0]),
+        np.array([1.0, 1.0, 0.0, 0.0]),
+        [0.5],
+        codes=np.array([0, 0, 1, 1]),
+        size=2,
+    )
+    assert np.isnan(result).all()
+
+
+def test_totals_and_means_match_pandas(download):
+    frs = FRS(2022)
+    adult = frs.adult
+    weighted = adult[["INEARNS", "SEINCAM2"]].mul(adult.GROSS4, axis=0)
+    band = pd.cut(adult.AGE80, [15, 30, 50, 65, 80])
+    totals = stats.totals(frs, "adult", ["INEARNS", "SEINCAM2"], by=band)
+    expected = weighted.groupby(band, observed=True).sum()
+    np.testing.assert_allclose(totals.to_numpy(), expected.to_numpy())
+    means = stats.means(frs, "adult", ["INEARNS"])
+    np.testing.assert_allclose(
+        means.INEARNS, np.average(adult.INEARNS, weights=adult.GROSS4)
+    )
+
+
+def test_deciles_split_the_weight_evenly(download):
+    frs = FRS(YEAR)
+    adult = frs.adult
+    deciles = stats.deciles(frs, "adult", "AGE80")
+    assert deciles.between(1, 10).all()
+    ranked = adult.assign(decile=deciles).sort_values("AGE80", kind="stable")
+    assert ranked.decile.is_monotonic_increasing
+    shares = adult.GROSS4.groupby(deciles).sum() / adult.GROSS4.sum()
+    assert shares.between(0.05, 0.15).all()
+
+
+def test_standard_errors_are_reproducible_in_parallel(download):
+    frs = FRS(YEAR)
+    serial = stats.standard_errors(
+        frs, "adult", ["INEARNS"], by="SEX", replicates=20, jobs=1
+    )
+    parallel = stats.standard_errors(
+        frs, "adult", ["INEARNS"], by="SEX", replicates=20, jobs=2
+    )
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert (serial.INEARNS > 0).all()
+    quantiles = stats.standard_errors(
+        frs, "adult", ["INEARNS"], "quantile", q=[0.5], replicates=20
+    )
+    assert quantiles.shape == (1, 1)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from family_resources_survey import storage
+from family_resources_survey.load import load
+
+from conftest import TABLES, YEAR, tab_file
+
+
+@pytest.mark.parametrize("table", TABLES)
+def test_round_trip(download, table):
+    expected = pd.read_csv(tab_file(download, table), sep="\t")
+    df = load(YEAR, table, add_entity_ids=False)
+    assert list(df.columns) == list(expected.columns)
+    assert len(df) == len(expected)
+    for column in expected.columns:
+        values = pd.to_numeric(expected[column], errors="coerce")
+        if pd.api.types.is_integer_dtype(values):
+            assert pd.api.types.is_integer_dtype(df[column]), column
+        np.testing.assert_array_equal(
+            df[column].to_numpy(np.float64),
+            values.to_numpy(np.float64),
+            err_msg=column,
+        )
+
+
+def test_read_table_projects_columns_in_stored_order(workspace):
+    folder = workspace / "store"
+    df = pd.DataFrame(dict(a=[1, 2, 3], b=[0.5, 1.5, 2.5], c=[7, 8, 9]))
+    storage.write_table(df, folder)
+    projected = storage.read_table(folder, columns=["c", "a"])
+    assert list(projected.columns) == ["a", "c"]
+    np.testing.assert_array_equal(
+        projected.to_numpy(), df[["a", "c"]].to_numpy()
+    )
+    with pytest.raises(ValueError):
+        storage.read_table(folder, columns=["d"])
+    rows = storage.read_rows(folder, ["b"], np.array([0, 2]))
+    assert list(rows.index) == [0, 2]
+    assert list(rows.b) == [0.5, 2.5]
+
+
+def test_loaded_tables_are_writable(download):
+    adult = load(YEAR, "adult")
+    adult.loc[adult.AGE80 > 60, "INEARNS"] = 0
+    adult.iloc[:3, 6] = 1.0
+    adult.loc[0, "INEARNS"] = -1
+    assert adult.loc[0, "INEARNS"] == -1
+    # Writes stay private to the frame, never reaching the stored files.
+    assert load(YEAR, "adult").loc[0, "INEARNS"] != -1
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from family_resources_survey.synthetic import generate
+
+from conftest import TABLES, tab_file
+
+
+def test_generate_writes_the_ukda_layout(workspace):
+    folder = generate(workspace / "layout", households=50, extra_columns=2)
+    main_folder = folder / "UKDA-0000-tab"
+    for table in TABLES:
+        assert (main_folder / "tab" / (table + ".tab")).exists()
+    assert any((main_folder / "mrdoc" / "excel").glob("*.xlsx"))
+
+
+def test_generate_nests_entity_keys(workspace):
+    folder = generate(workspace / "keys", households=200, extra_columns=0)
+    tab = folder / "UKDA-0000-tab" / "tab"
+    househol = pd.read_csv(tab / "househol.tab", sep="\t")
+    benunit = pd.read_csv(tab / "benunit.tab", sep="\t")
+    people = pd.concat(
+        [
+            pd.read_csv(tab / "adult.tab", sep="\t"),
+            pd.read_csv(tab / "child.tab", sep="\t"),
+        ]
+    )
+    assert househol.sernum.is_unique
+    assert not benunit.duplicated(["sernum", "BENUNIT"]).any()
+    assert benunit.sernum.isin(househol.sernum).all()
+    assert not people.duplicated(["sernum", "PERSON"]).any()
+    assert people.PERSON.between(1, 9).all()
+    assert (
+        people.set_index(["sernum", "BENUNIT"])
+        .index.isin(benunit.set_index(["sernum", "BENUNIT"]).index)
+        .all()
+    )
+
+
+def test_generate_is_reproducible(workspace):
+    first = generate(workspace / "first", households=20, extra_columns=1)
+    second = generate(workspace / "second", households=20, extra_columns=1)
+    for table in TABLES:
+        assert (
+            tab_file(first, table).read_bytes()
+            == tab_file(second, table).read_bytes()
+        )
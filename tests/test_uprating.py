@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from family_resources_survey import FRS
+from family_resources_survey.load import BatchUprating, Uprating, load
+
+from conftest import YEAR
+
+TARGET_YEAR = 2022
+
+
+def test_uprating_leaves_the_table_unchanged(download):
+    adult = load(YEAR, "adult")
+    before = adult.to_numpy(copy=True)
+    uprated = Uprating(YEAR, TARGET_YEAR)(adult)
+    assert not np.allclose(uprated.GROSS4, adult.GROSS4)
+    uprated.loc[0, "SEX"] = 9
+    uprated.loc[0, "INEARNS"] = -1
+    np.testing.assert_array_equal(adult.to_numpy(), before)
+
+
+def test_writes_to_tables_do_not_reach_the_cache(download):
+    for year in (YEAR, TARGET_YEAR):
+        frs = FRS(year)
+        adult = frs.adult
+        adult.loc[0, "INEARNS"] = -1
+        adult.loc[0, "GROSS4"] = -1
+        assert frs.adult.loc[0, "INEARNS"] != -1
+        assert frs.adult.loc[0, "GROSS4"] != -1
+
+
+def test_uprated_views_are_cached(download):
+    frs = FRS(TARGET_YEAR)
+    first = frs.adult
+    second = frs.adult
+    assert np.shares_memory(first.AGE80.values, second.AGE80.values)
+    assert frs.cache_stats["hits"] >= 1
+
+
+@pytest.mark.parametrize("table", ["adult", "benunit"])
+def test_batch_uprating_matches_uprating(download, table):
+    df = load(YEAR, table)
+    target_years = [2019, 2020, 2021, 2022]
+    batch = BatchUprating(YEAR, target_years)(df)
+    assert "GROSS4" in batch
+    for i, year in enumerate(target_years):
+        uprated = Uprating(YEAR, year)(df)
+        for column, values in batch.items():
+            np.testing.assert_allclose(
+                values[:, i], uprated[column].to_numpy(np.float64)
+            )